@@ -0,0 +1,270 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional
+
+from deadline import get_deadline
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# name: (env var for the in-flight cap, default cap, initial service-time estimate in seconds)
+STAGES = {
+    "scrape": ("ADMISSION_SCRAPE_LIMIT", 8, 20.0),
+    "summarize": ("ADMISSION_SUMMARIZE_LIMIT", 2, 30.0),
+    "tts": ("ADMISSION_TTS_LIMIT", 4, 10.0),
+}
+MAX_QUEUED = int(os.getenv("ADMISSION_MAX_QUEUED", "50"))
+# Shared by every worker on the node; when set, the stage caps above hold node-wide
+ADMISSION_LOCK_DIR = os.getenv("ADMISSION_LOCK_DIR")
+NODE_SLOT_POLL_SECONDS = 0.05
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be served before its deadline"""
+
+    def __init__(self, stage: str, retry_after: float):
+        super().__init__(f"Server busy at stage '{stage}', retry in {math.ceil(retry_after)}s")
+        self.stage = stage
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+current_priority: ContextVar[str] = ContextVar("current_priority", default="interactive")
+
+
+class NodeSlots:
+    """
+    Cross-process cap for one stage: `limit` lock files in a directory shared
+    by all workers, each held with flock() by the worker using that slot.
+
+    The kernel drops a worker's locks when it exits, so a crashed worker never
+    leaks a slot. Waiting polls the lock files; the per-worker StageGate in
+    front of it still orders its own waiters by priority.
+    """
+
+    def __init__(self, directory: str, name: str, limit: int):
+        self.paths = [Path(directory) / f"{name}.{index}.lock" for index in range(limit)]
+        self._files = None
+        self._held = set()
+
+    def _try_acquire(self) -> Optional[int]:
+        if self._files is None:
+            # Opened on first use so every worker process has its own file descriptions
+            self.paths[0].parent.mkdir(parents=True, exist_ok=True)
+            self._files = [open(path, "a") for path in self.paths]
+        for index, file in enumerate(self._files):
+            if index in self._held:
+                continue
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            self._held.add(index)
+            return index
+        return None
+
+    async def acquire(self, timeout: Optional[float]) -> int:
+        """
+        Raises:
+            asyncio.TimeoutError: If no slot on the node frees up within `timeout`
+        """
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            index = self._try_acquire()
+            if index is not None:
+                return index
+            if expires_at is not None and time.monotonic() >= expires_at:
+                raise asyncio.TimeoutError
+            await asyncio.sleep(NODE_SLOT_POLL_SECONDS)
+
+    def release(self, index: int) -> None:
+        fcntl.flock(self._files[index], fcntl.LOCK_UN)
+        self._held.discard(index)
+
+
+class StageGate:
+    """
+    Caps concurrent work in one pipeline stage and queues the rest by priority.
+
+    Waiters are served lowest priority value first, FIFO within a class. The
+    service time per slot is tracked as a moving average so queue wait can be
+    estimated before a request commits to waiting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        initial_service_seconds: float,
+        node_slots: Optional[NodeSlots] = None
+    ):
+        self.name = name
+        self.limit = max(1, limit)
+        self.node_slots = node_slots
+        self.in_flight = 0
+        self.avg_service_seconds = initial_service_seconds
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    def queued(self, priority: Optional[int] = None) -> int:
+        """Waiters still queued, optionally only those served before or with `priority`"""
+        return sum(
+            1 for p, _, future in self._waiters
+            if not future.done() and (priority is None or p <= priority)
+        )
+
+    def estimated_wait(self, priority: int) -> float:
+        """Expected seconds a new waiter of this priority would queue"""
+        if self.in_flight < self.limit and not self.queued():
+            return 0.0
+        ahead = self.queued(priority)
+        return (ahead // self.limit + 1) * self.avg_service_seconds
+
+    async def acquire(self, priority: int, timeout: Optional[float]) -> None:
+        if self.in_flight < self.limit and not self.queued():
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        wait = self.estimated_wait(priority)
+        if timeout is not None and wait > timeout:
+            self.rejected += 1
+            raise AdmissionRejected(self.name, wait)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release(record=False)
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise AdmissionRejected(self.name, self.estimated_wait(priority))
+            raise
+        self.admitted += 1
+
+    def release(self, elapsed: Optional[float] = None, record: bool = True) -> None:
+        if record and elapsed is not None:
+            self.avg_service_seconds = 0.8 * self.avg_service_seconds + 0.2 * elapsed
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot straight to the next waiter
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int, timeout: Optional[float]):
+        waited_from = time.monotonic()
+        await self.acquire(priority, timeout)
+        node_slot = None
+        if self.node_slots:
+            left = None if timeout is None else max(0.0, timeout - (time.monotonic() - waited_from))
+            try:
+                node_slot = await self.node_slots.acquire(left)
+            except BaseException as e:
+                self.release(record=False)
+                if isinstance(e, asyncio.TimeoutError):
+                    self.admitted -= 1
+                    self.rejected += 1
+                    raise AdmissionRejected(self.name, self.avg_service_seconds)
+                raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            if node_slot is not None:
+                self.node_slots.release(node_slot)
+            self.release(time.monotonic() - started)
+
+    def metrics(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "node_wide": self.node_slots is not None,
+            "in_flight": self.in_flight,
+            "queued": {
+                name: sum(1 for p, _, future in self._waiters if p == level and not future.done())
+                for name, level in PRIORITIES.items()
+            },
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_service_seconds": round(self.avg_service_seconds, 2),
+        }
+
+
+class AdmissionController:
+    """
+    Admission control in front of the generation pipeline
+
+    Queues and priorities are per worker. The stage caps are per worker too,
+    unless a lock directory shared by all workers is configured
+    (ADMISSION_LOCK_DIR, set by production mode), in which case each cap
+    bounds the whole node, e.g. at most two Ollama generations in total.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = ADMISSION_LOCK_DIR):
+        if lock_dir and fcntl is None:
+            logger.warning("ADMISSION_LOCK_DIR needs flock(); stage caps apply per worker on this platform")
+            lock_dir = None
+        self.gates = {}
+        for name, (env_var, default, service) in STAGES.items():
+            limit = max(1, int(os.getenv(env_var, str(default))))
+            node_slots = NodeSlots(lock_dir, name, limit) if lock_dir else None
+            self.gates[name] = StageGate(name, limit, service, node_slots)
+        self.rejected = 0
+
+    def admit(self, priority: str, budget_seconds: float) -> None:
+        """
+        Decide up front whether a new request can finish within its budget
+
+        Raises:
+            AdmissionRejected: With a Retry-After estimate when the queues are too long
+        """
+        level = PRIORITIES[priority]
+        queued = sum(gate.queued() for gate in self.gates.values())
+        expected = sum(gate.estimated_wait(level) for gate in self.gates.values())
+        if queued >= MAX_QUEUED or expected > budget_seconds:
+            self.rejected += 1
+            raise AdmissionRejected("admission", expected)
+
+    @asynccontextmanager
+    async def stage(self, name: str, reserve: float = 0.0):
+        """
+        Hold a slot in a stage for the current request's priority
+
+        Waits at most the remaining request deadline minus `reserve` seconds
+        kept back for the work done inside the slot and after it.
+        """
+        deadline = get_deadline()
+        timeout = max(0.0, deadline.remaining() - reserve) if deadline else None
+        async with self.gates[name].slot(PRIORITIES[current_priority.get()], timeout):
+            yield
+
+    def metrics(self) -> Dict:
+        return {
+            "rejected_at_admission": self.rejected,
+            "stages": {name: gate.metrics() for name, gate in self.gates.items()},
+        }
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,242 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS headlines (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    source TEXT NOT NULL,
+    url TEXT,
+    title TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    fetched_day TEXT NOT NULL,
+    UNIQUE (topic, source, title, fetched_day)
+);
+CREATE INDEX IF NOT EXISTS idx_headlines_topic_time ON headlines (topic, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_headlines_time ON headlines (fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS headlines_fts USING fts5(
+    title, topic, content='headlines', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS headlines_ai AFTER INSERT ON headlines BEGIN
+    INSERT INTO headlines_fts (rowid, title, topic) VALUES (new.id, new.title, new.topic);
+END;
+"""
+
+BUCKET_FORMATS = {
+    "hour": 13,  # YYYY-MM-DDTHH
+    "day": 10,   # YYYY-MM-DD
+    "month": 7,  # YYYY-MM
+}
+
+
+def _utc_iso(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _fts_query(text: str) -> str:
+    """Quote every term so free text from users cannot break FTS5 query syntax"""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class HeadlineArchive:
+    """
+    Local SQLite archive of every scraped headline with a full-text index.
+
+    Writes are queued and inserted in batches by a background thread so the
+    request path never waits on disk. Reads open their own connection.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="headline-archive", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def add_headlines(
+        self,
+        topic: str,
+        source: str,
+        url: Optional[str],
+        headlines: Iterable[str],
+        fetched_at: Optional[datetime] = None
+    ) -> None:
+        """Queue headlines for archiving (non-blocking)"""
+        if self._closed:
+            return
+        stamp = _utc_iso(fetched_at or datetime.now(timezone.utc))
+        for title in headlines:
+            title = title.strip()
+            if title:
+                self._queue.put((topic, source, url, title, stamp, stamp[:10]))
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        try:
+            while True:
+                batch = []
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                stop = item is None
+                if not stop:
+                    batch.append(item)
+                # Drain whatever else is already waiting, up to one batch
+                while not stop and len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                    else:
+                        batch.append(item)
+                if batch:
+                    try:
+                        with conn:
+                            conn.executemany(
+                                "INSERT OR IGNORE INTO headlines "
+                                "(topic, source, url, title, fetched_at, fetched_day) "
+                                "VALUES (?, ?, ?, ?, ?, ?)",
+                                batch
+                            )
+                    except sqlite3.Error as e:
+                        logger.error(f"Headline archive write failed: {str(e)}")
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def flush(self) -> None:
+        """Block until every queued headline has been written"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write pending headlines and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def _where(
+        self,
+        query: Optional[str],
+        topic: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ):
+        clauses, params = [], []
+        if query and _fts_query(query):
+            clauses.append("h.id IN (SELECT rowid FROM headlines_fts WHERE headlines_fts MATCH ?)")
+            params.append(_fts_query(query))
+        if topic:
+            clauses.append("h.topic = ? COLLATE NOCASE")
+            params.append(topic)
+        if since:
+            clauses.append("h.fetched_at >= ?")
+            params.append(_utc_iso(since))
+        if until:
+            clauses.append("h.fetched_at < ?")
+            params.append(_utc_iso(until))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        topic: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50
+    ) -> List[Dict]:
+        """
+        Search archived headlines, newest first
+
+        Args:
+            query: Full-text search terms (all must match)
+            topic: Restrict to one scraped topic
+            since: Inclusive lower bound on fetch time
+            until: Exclusive upper bound on fetch time
+            limit: Maximum number of rows
+
+        Returns:
+            list: Dicts with topic, source, url, title and fetched_at
+        """
+        where, params = self._where(query, topic, since, until)
+        sql = (
+            f"SELECT h.topic, h.source, h.url, h.title, h.fetched_at FROM headlines h {where} "
+            "ORDER BY h.fetched_at DESC LIMIT ?"
+        )
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(sql, [*params, limit])]
+
+    def aggregate(
+        self,
+        query: Optional[str] = None,
+        topic: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        bucket: str = "day"
+    ) -> List[Dict]:
+        """Count matching headlines per time bucket and source"""
+        if bucket not in BUCKET_FORMATS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKET_FORMATS)}")
+        where, params = self._where(query, topic, since, until)
+        width = BUCKET_FORMATS[bucket]
+        sql = (
+            f"SELECT substr(h.fetched_at, 1, {width}) AS bucket, h.source, COUNT(*) AS headlines, "
+            f"COUNT(DISTINCT h.topic) AS topics FROM headlines h {where} "
+            "GROUP BY bucket, h.source ORDER BY bucket"
+        )
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def headlines_for_window(self, topic: str, days: int = 7, limit: int = 200) -> List[str]:
+        """Distinct headline texts archived for a topic over the last `days` days"""
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        rows = self.search(topic=topic, since=since, limit=limit)
+        return list(dict.fromkeys(row["title"] for row in rows))
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> Optional[HeadlineArchive]:
+    """Return the process-wide archive, or None when ARCHIVE_ENABLED is false"""
+    global _archive
+    if os.getenv("ARCHIVE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = HeadlineArchive(os.getenv("ARCHIVE_DB_PATH", "archive/headlines.db"))
+            atexit.register(_archive.close)
+        return _archive
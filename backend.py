@@ -1,92 +1,646 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 import os
+import json
+import re
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
 from dotenv import load_dotenv
-from models import NewsRequest
-from utils import generate_broadcast_news_free, tts_to_audio
+
+# Load .env once, before the local modules below read their settings from the environment
+load_dotenv()
+
+from models import NewsRequest, TopicResult
+from admission import admission_controller, AdmissionRejected, current_priority
+from archive import get_archive
+from deadline import (
+    Deadline,
+    DeadlineExceeded,
+    current_deadline,
+    DEFAULT_DEADLINE_SECONDS,
+    MAX_DEADLINE_SECONDS,
+    MIN_LLM_SECONDS,
+    TTS_RESERVE_SECONDS
+)
+from utils import (
+    generate_broadcast_news_free,
+    headlines_only_script,
+    tts_to_audio_chunks,
+    store_audio_by_hash,
+    sweep_audio_chunks,
+    summarize_with_anthropic_news_script,
+    get_http_session,
+    close_http_session,
+    ollama_warm_up,
+    ollama_model_loaded,
+    tts_warm_up
+)
 from news_scraper import NewsScraper
+import profiling
+from reddit_scraper import scrape_reddit_topics
 import asyncio
 import logging
+import requests
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-load_dotenv()
+AUDIO_DIR = Path("audio")
+AUDIO_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+DISCONNECT_POLL_SECONDS = 1.0
+DRAIN_TIMEOUT_SECONDS = int(os.getenv("DRAIN_TIMEOUT_SECONDS", "30"))
+# After SIGTERM, keep serving (but fail /ready and refuse new generations) this long
+# so load balancers stop routing here before uvicorn closes the listening socket
+DRAIN_PRESTOP_SECONDS = float(os.getenv("DRAIN_PRESTOP_SECONDS", "5"))
+PIPELINE_THREADS = int(os.getenv("PIPELINE_THREADS", "32"))
+WARM_CHECK_INTERVAL_SECONDS = 60
+AUDIO_SWEEP_INTERVAL_SECONDS = 60
+ARCHIVE_MAX_DAYS = 3650
+ARCHIVE_SEARCH_MAX_LIMIT = 500
+# Per-chunk TTS files stay this long for clients fetching partial audio, then get swept.
+# Never shorter than the longest allowed request, or the sweep could delete a running one's chunks
+AUDIO_CHUNK_TTL_SECONDS = max(
+    float(os.getenv("AUDIO_CHUNK_TTL_SECONDS", "600")),
+    MAX_DEADLINE_SECONDS + AUDIO_SWEEP_INTERVAL_SECONDS
+)
 
-@app.post("/generate-news-audio")
-async def generate_news_audio(request: NewsRequest):
+
+async def _keep_warm(app: FastAPI) -> None:
+    """Load the Ollama model and probe gTTS at startup, then keep the model resident"""
+    while True:
+        if not await asyncio.to_thread(ollama_model_loaded):
+            try:
+                logger.info("Warming up Ollama model...")
+                await asyncio.to_thread(ollama_warm_up)
+            except Exception as e:
+                logger.warning(f"Ollama warm-up failed: {str(e)}")
+        app.state.ollama_warm = await asyncio.to_thread(ollama_model_loaded)
+
+        if not app.state.tts_warm:
+            try:
+                await asyncio.to_thread(tts_warm_up)
+                app.state.tts_warm = True
+            except Exception as e:
+                logger.warning(f"TTS warm-up failed: {str(e)}")
+
+        await asyncio.sleep(WARM_CHECK_INTERVAL_SECONDS)
+
+
+def _install_drain_hook(app: FastAPI):
+    """
+    Mark the worker as draining as soon as SIGTERM arrives
+
+    uvicorn only runs lifespan shutdown after it has stopped accepting and
+    drained connections, which is too late for /ready to report it. Its
+    SIGTERM handler is installed before startup, so wrap it: flip the
+    draining flag now and hand the signal on after DRAIN_PRESTOP_SECONDS.
+
+    Returns:
+        The wrapped handler to restore on shutdown, or None if not installed
+    """
+    if DRAIN_PRESTOP_SECONDS <= 0 or threading.current_thread() is not threading.main_thread():
+        return None
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return None
+    loop = asyncio.get_running_loop()
+
+    def on_sigterm(sig, frame):
+        if app.state.draining:
+            # A second SIGTERM skips the rest of the pre-stop delay
+            previous(sig, frame)
+            return
+        app.state.draining = True
+        logger.info(f"SIGTERM received, draining for {DRAIN_PRESTOP_SECONDS:.0f}s before shutdown")
+        loop.call_soon_threadsafe(loop.call_later, DRAIN_PRESTOP_SECONDS, previous, sig, frame)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    return previous
+
+
+async def _sweep_audio() -> None:
+    """Periodically delete TTS chunk files that have already been joined and served"""
+    while True:
+        try:
+            removed = await asyncio.to_thread(sweep_audio_chunks, str(AUDIO_DIR), AUDIO_CHUNK_TTL_SECONDS)
+            if removed:
+                logger.info(f"Removed {removed} expired audio chunk file(s)")
+        except OSError as e:
+            logger.warning(f"Audio chunk sweep failed: {str(e)}")
+        await asyncio.sleep(AUDIO_SWEEP_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared per-worker resources on startup and drain them on shutdown"""
+    executor = ThreadPoolExecutor(max_workers=PIPELINE_THREADS, thread_name_prefix="pipeline")
+    # asyncio.to_thread runs on the default executor, so this bounds all pipeline threads
+    asyncio.get_running_loop().set_default_executor(executor)
+    get_http_session()
+    app.state.news_scraper = NewsScraper()
+    app.state.archive = get_archive()
+    warm_task = asyncio.create_task(_keep_warm(app))
+    sweep_task = asyncio.create_task(_sweep_audio())
+    rolling_profiler = None
+    if profiling.PROFILE_SAMPLE_HZ > 0:
+        rolling_profiler = profiling.RollingProfiler(
+            profiling.PROFILE_SAMPLE_HZ,
+            profiling.PROFILE_WINDOW_SECONDS,
+            profiling.PROFILE_KEEP_WINDOWS
+        ).start()
+    sigterm_handler = _install_drain_hook(app)
+
+    yield
+
+    # uvicorn has already waited up to timeout_graceful_shutdown for open requests
+    if sigterm_handler:
+        signal.signal(signal.SIGTERM, sigterm_handler)
+    warm_task.cancel()
+    sweep_task.cancel()
+    if app.state.archive:
+        await asyncio.to_thread(app.state.archive.close)
+    close_http_session()
+    if rolling_profiler:
+        await asyncio.to_thread(rolling_profiler.stop)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(profiling.ProfilingMiddleware)
+app.state.in_flight = 0
+app.state.draining = False
+app.state.ollama_warm = False
+app.state.tts_warm = False
+
+
+def _reject_if_draining() -> None:
+    if app.state.draining:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is shutting down",
+            headers={"Retry-After": "5"}
+        )
+
+
+@contextmanager
+def _track_generation():
+    """Refuse new generations while draining and count the running ones for /ready and metrics"""
+    _reject_if_draining()
+    app.state.in_flight += 1
+    try:
+        yield
+    finally:
+        app.state.in_flight -= 1
+
+
+def _format_sse(event: dict) -> str:
+    """Format a pipeline event as a Server-Sent Events message"""
+    return f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def run_generation_pipeline(request: NewsRequest, emit: Callable[..., None]) -> str:
+    """
+    Scrape sources, write the broadcast script and synthesize it to audio.
+
+    The request deadline is set for the duration of the call so every stage
+    bounds its own timeouts by the remaining budget.
+
+    Args:
+        request: Topics, source selection and optional deadline
+        emit: Callback called as emit(stage, progress=..., **data) at each stage
+
+    Returns:
+        str: Path to the final MP3 file
+    """
+    deadline = Deadline(request.deadline_seconds or DEFAULT_DEADLINE_SECONDS)
+    token = current_deadline.set(deadline)
+    priority_token = current_priority.set(request.priority)
     try:
-        results = {}
-        
+        return await _run_stages(request, emit, deadline)
+    except asyncio.CancelledError:
+        # Stop Ollama/BrightData calls still running in worker threads for this request
+        deadline.cancel()
+        raise
+    finally:
+        current_priority.reset(priority_token)
+        current_deadline.reset(token)
+
+
+async def _run_stages(request: NewsRequest, emit: Callable[..., None], deadline: Deadline) -> str:
+    topic_results = [TopicResult(topic) for topic in request.topics]
+    topic_count = max(len(request.topics), 1)
+
+    # Scraping (and the per-topic Ollama summaries inside it) holds a scrape slot
+    async with admission_controller.stage("scrape", reserve=MIN_LLM_SECONDS + TTS_RESERVE_SECONDS):
         # Scrape news if requested
         if request.source_type in ["news", "both"]:
+            finished_topics = 0
+
+            def on_news_event(stage, **data):
+                nonlocal finished_topics
+                if stage in ("topic_summarized", "topic_failed", "topic_skipped"):
+                    finished_topics += 1
+                emit(stage, progress=5 + 35 * finished_topics // topic_count, source="news", **data)
+
             try:
                 logger.info(f"Scraping news for topics: {request.topics}")
-                news_scraper = NewsScraper()
-                results["news"] = await news_scraper.scrape_news(request.topics)
+                news_scraper = getattr(app.state, "news_scraper", None) or NewsScraper()
+                news = await news_scraper.scrape_news(request.topics, on_event=on_news_event)
+                for result in topic_results:
+                    result.news = news["news_analysis"].get(result.topic, "")
             except Exception as e:
                 logger.error(f"News scraping error: {str(e)}")
-                results["news"] = {"news_analysis": {topic: "" for topic in request.topics}}
-        
+
         # Scrape Reddit if requested
         if request.source_type in ["reddit", "both"]:
             try:
                 logger.info(f"Scraping Reddit for topics: {request.topics}")
-                from reddit_scraper import scrape_reddit_topics
-                results["reddit"] = await scrape_reddit_topics(request.topics)
+                emit("scraping", progress=40, source="reddit", topics=request.topics)
+                reddit = await scrape_reddit_topics(request.topics)
+                for result in topic_results:
+                    result.discussion = reddit["reddit_analysis"].get(result.topic, "")
             except Exception as e:
                 logger.error(f"Reddit scraping error: {str(e)}")
-                results["reddit"] = {"reddit_analysis": {topic: "" for topic in request.topics}}
-        
-        # Use available data or defaults
-        news_data = results.get("news", {"news_analysis": {}})
-        reddit_data = results.get("reddit", {"reddit_analysis": {}})
-        
-        logger.info("Generating broadcast news...")
-        news_summary = generate_broadcast_news_free(
-            news_data=news_data,
-            reddit_data=reddit_data,
-            topics=request.topics
-        )
-        
-        if not news_summary or news_summary.strip() == "":
-            raise HTTPException(status_code=500, detail="Failed to generate news summary")
-        
-        logger.info("Converting text to audio...")
-        audio_path = tts_to_audio(text=news_summary)
-        
+
+    logger.info("Generating broadcast news...")
+    emit("summarizing", progress=45)
+    degraded = not deadline.has_budget_for(MIN_LLM_SECONDS + TTS_RESERVE_SECONDS)
+    if not degraded:
+        try:
+            async with admission_controller.stage("summarize", reserve=MIN_LLM_SECONDS + TTS_RESERVE_SECONDS):
+                news_summary = await asyncio.to_thread(generate_broadcast_news_free, topic_results)
+        except (DeadlineExceeded, requests.exceptions.Timeout, AdmissionRejected) as e:
+            logger.warning(f"Broadcast generation ran out of time: {str(e)}")
+            degraded = True
+    if degraded:
+        # Fast fallback: read the per-topic content as-is
+        logger.info("Deadline nearly exhausted, using headlines-only script")
+        news_summary = headlines_only_script(topic_results)
+    # Only the script is needed from here on; free the per-topic text before TTS
+    del topic_results
+
+    if not news_summary or news_summary.strip() == "":
+        raise HTTPException(status_code=500, detail="Failed to generate news summary")
+    emit("summary_done", progress=60, characters=len(news_summary), degraded=degraded)
+
+    logger.info("Converting text to audio...")
+    chunk_paths = []
+    chunks = tts_to_audio_chunks(text=news_summary)
+    # Keep at least half the TTS reserve for synthesis after waiting for a slot
+    async with admission_controller.stage("tts", reserve=TTS_RESERVE_SECONDS / 2):
+        while True:
+            if chunk_paths and deadline.expired:
+                # Return the audio synthesized so far rather than nothing
+                emit("tts_truncated", progress=98, chunks=len(chunk_paths))
+                break
+            # Each gTTS call blocks on the network, so step the generator in a thread
+            try:
+                item = await asyncio.to_thread(next, chunks, None)
+            except Exception as e:
+                if not chunk_paths:
+                    raise
+                # A late chunk usually fails on its deadline-capped timeout; keep what we have
+                logger.warning(f"TTS stopped after {len(chunk_paths)} chunk(s): {str(e)}")
+                emit("tts_truncated", progress=98, chunks=len(chunk_paths))
+                break
+            if item is None:
+                break
+            index, total, path = item
+            chunk_paths.append(path)
+            emit(
+                "tts_chunk",
+                progress=60 + 38 * index // total,
+                chunk=index,
+                total=total,
+                audio_url=f"/audio/{Path(path).name}"
+            )
+
+    if not chunk_paths:
+        raise HTTPException(status_code=500, detail="Failed to generate audio file")
+
+    return store_audio_by_hash(chunk_paths, str(AUDIO_DIR))
+
+
+def _too_busy(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def _admit(request: NewsRequest) -> None:
+    """Reject up front (429) when queued work would outlast the request's deadline"""
+    try:
+        admission_controller.admit(request.priority, request.deadline_seconds or DEFAULT_DEADLINE_SECONDS)
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected {request.priority} request: {str(e)}")
+        raise _too_busy(e)
+
+
+async def _cancel_on_disconnect(http_request: Request, task: asyncio.Task) -> None:
+    """Cancel a generation task once its client has gone away"""
+    while not task.done():
+        if await http_request.is_disconnected():
+            logger.info("Client disconnected, cancelling generation")
+            task.cancel()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+@app.post("/generate-news-audio")
+async def generate_news_audio(request: NewsRequest, http_request: Request):
+    _admit(request)
+    try:
+        with _track_generation():
+            task = asyncio.create_task(run_generation_pipeline(request, emit=lambda stage, **data: None))
+            watcher = asyncio.create_task(_cancel_on_disconnect(http_request, task))
+            try:
+                audio_path = await task
+            finally:
+                watcher.cancel()
+
         if audio_path and Path(audio_path).exists():
-            with open(audio_path, "rb") as f:
-                audio_bytes = f.read()
             logger.info(f"Audio generated successfully: {audio_path}")
-            return Response(
-                content=audio_bytes,
+            # Streamed from disk in blocks rather than read into memory whole
+            return FileResponse(
+                audio_path,
                 media_type="audio/mpeg",
-                headers={"Content-Disposition": "attachment; filename=news-summary.mp3"}
+                headers={
+                    "Content-Disposition": "attachment; filename=news-summary.mp3",
+                    "X-Audio-Id": Path(audio_path).stem
+                }
             )
         else:
             raise HTTPException(status_code=500, detail="Failed to generate audio file")
-    
+
     except HTTPException as http_e:
         logger.error(f"HTTP Error: {http_e.detail}")
         raise http_e
+    except AdmissionRejected as e:
+        logger.warning(f"Request shed: {str(e)}")
+        raise _too_busy(e)
+    except DeadlineExceeded as e:
+        logger.error(f"Deadline exceeded: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+
+@app.post("/generate-news-audio/stream")
+async def generate_news_audio_stream(request: NewsRequest):
+    """
+    Run the generation pipeline and stream stage events as Server-Sent Events.
+
+    Events: scraping, headlines_extracted, topic_summarized, topic_failed,
+    topic_skipped, summarizing, summary_done, tts_chunk (with a playable
+    audio_url), tts_truncated, done (with the full audio_url) and error.
+    """
+    _reject_if_draining()
+    _admit(request)
+    queue = asyncio.Queue()
+
+    def emit(stage, **data):
+        queue.put_nowait({"stage": stage, **data})
+
+    async def run():
+        try:
+            with _track_generation():
+                audio_path = await run_generation_pipeline(request, emit)
+            logger.info(f"Audio generated successfully: {audio_path}")
+            emit(
+                "done",
+                progress=100,
+                audio_id=Path(audio_path).stem,
+                audio_url=f"/audio/{Path(audio_path).name}"
+            )
+        except HTTPException as http_e:
+            logger.error(f"HTTP Error: {http_e.detail}")
+            emit("error", detail=http_e.detail)
+        except AdmissionRejected as e:
+            logger.warning(f"Request shed: {str(e)}")
+            emit("error", detail=str(e), retry_after=e.retry_after)
+        except DeadlineExceeded as e:
+            logger.error(f"Deadline exceeded: {str(e)}")
+            emit("error", detail=str(e))
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+            emit("error", detail=f"Error: {str(e)}")
+        finally:
+            queue.put_nowait(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield _format_sse(event)
+        finally:
+            # Stop the pipeline if the client disconnected mid-stream
+            task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/audio/{filename}")
+async def get_audio(filename: str):
+    """Serve a generated MP3 (full briefing by content hash, or a partial TTS chunk)"""
+    audio_path = AUDIO_DIR / Path(filename).name
+    if audio_path.suffix != ".mp3" or not audio_path.is_file():
+        raise HTTPException(status_code=404, detail="Audio not found")
+    headers = {}
+    if AUDIO_ID_PATTERN.fullmatch(audio_path.stem):
+        # Content-addressed files never change
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return FileResponse(audio_path, media_type="audio/mpeg", headers=headers)
+
+
+def _require_archive():
+    archive = get_archive()
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Headline archive is disabled")
+    return archive
+
+
+def _window_start(days: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+@app.get("/archive/search")
+async def archive_search(
+    q: Optional[str] = None,
+    topic: Optional[str] = None,
+    days: int = Query(7, ge=1, le=ARCHIVE_MAX_DAYS),
+    limit: int = Query(50, ge=1, le=ARCHIVE_SEARCH_MAX_LIMIT)
+):
+    """Search archived headlines from the last `days` days"""
+    archive = _require_archive()
+    since = _window_start(days)
+    rows = await asyncio.to_thread(archive.search, query=q, topic=topic, since=since, limit=limit)
+    return {"count": len(rows), "headlines": rows}
+
+
+@app.get("/archive/aggregate")
+async def archive_aggregate(
+    q: Optional[str] = None,
+    topic: Optional[str] = None,
+    days: int = Query(7, ge=1, le=ARCHIVE_MAX_DAYS),
+    bucket: str = "day"
+):
+    """Headline counts per time bucket and source over the last `days` days"""
+    archive = _require_archive()
+    since = _window_start(days)
+    try:
+        buckets = await asyncio.to_thread(archive.aggregate, query=q, topic=topic, since=since, bucket=bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"buckets": buckets}
+
+
+@app.get("/archive/summary")
+async def archive_summary(topic: str, days: int = Query(7, ge=1, le=ARCHIVE_MAX_DAYS)):
+    """Summarize what the news said about a topic over a past window, from the archive only"""
+    archive = _require_archive()
+    headlines = await asyncio.to_thread(archive.headlines_for_window, topic, days)
+    if not headlines:
+        raise HTTPException(status_code=404, detail=f"No archived headlines for '{topic}' in the last {days} days")
+    # Same Ollama cap and time budget as the generation pipeline
+    token = current_deadline.set(Deadline(DEFAULT_DEADLINE_SECONDS))
+    try:
+        async with admission_controller.stage("summarize", reserve=MIN_LLM_SECONDS + TTS_RESERVE_SECONDS):
+            summary = await asyncio.to_thread(
+                summarize_with_anthropic_news_script,
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                headlines="\n".join(headlines)
+            )
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except (DeadlineExceeded, requests.exceptions.Timeout) as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    finally:
+        current_deadline.reset(token)
+    return {"topic": topic, "days": days, "headline_count": len(headlines), "summary": summary}
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+def _require_admin(token: Optional[str]) -> None:
+    if not profiling.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not profiling.token_matches(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def capture_profile(
+    seconds: float = 10,
+    hz: float = profiling.PROFILE_REQUEST_HZ,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Sample the whole process for `seconds` and return folded stacks (flamegraph input)"""
+    _require_admin(x_admin_token)
+    if not 0 < seconds <= 120 or not 0 < hz <= 1000:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 120] and hz in (0, 1000]")
+    sampler = profiling.StackSampler(hz).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await asyncio.to_thread(sampler.stop)
+    counts = sampler.take()
+    name = profiling.new_profile_name("admin")
+    await asyncio.to_thread(profiling.save_profile, counts, name)
+    return PlainTextResponse(profiling.format_folded(counts), headers={"X-Profile-Id": name})
+
+
+@app.get("/admin/profiles")
+async def stored_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Stored request, admin and rolling profiles, newest first"""
+    _require_admin(x_admin_token)
+    return {"profiles": profiling.list_profiles()}
+
+
+@app.get("/admin/profiles/{name}")
+async def stored_profile(name: str, x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    path = profiling.PROFILE_DIR / Path(name).name
+    if path.suffix != ".folded" or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain")
+
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """Queue length, in-flight work and rejections per pipeline stage"""
+    return {**admission_controller.metrics(), "generations_in_flight": app.state.in_flight}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 200 only when Ollama has the model loaded and gTTS answered"""
+    ollama_loaded = await asyncio.to_thread(ollama_model_loaded)
+    checks = {
+        "accepting": not app.state.draining,
+        "ollama": ollama_loaded,
+        "tts": app.state.tts_warm
+    }
+    ready = all(checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not ready",
+            "checks": checks,
+            "in_flight": app.state.in_flight
+        }
+    )
+
 if __name__ == "__main__":
+    import argparse
+    import tempfile
     import uvicorn
-    uvicorn.run(
-        "backend:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Run the InfoSync backend")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Run multiple workers without auto-reload and drain gracefully on shutdown"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.production:
+        # Workers share one set of stage caps (see admission.AdmissionController)
+        os.environ.setdefault(
+            "ADMISSION_LOCK_DIR",
+            str(Path(tempfile.gettempdir()) / f"infosync-admission-{args.port}")
+        )
+        uvicorn.run(
+            "backend:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            timeout_graceful_shutdown=DRAIN_TIMEOUT_SECONDS
+        )
+    else:
+        # Reloads restart the worker with SIGTERM; don't hold them up with a pre-stop delay
+        os.environ.setdefault("DRAIN_PRESTOP_SECONDS", "0")
+        uvicorn.run(
+            "backend:app",
+            host=args.host,
+            port=args.port,
+            reload=True
+        )
\ No newline at end of file
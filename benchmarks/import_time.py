@@ -0,0 +1,112 @@
+"""
+Cold-start import benchmark based on `python -X importtime`.
+
+Measures the cumulative import time of the backend modules in fresh
+interpreters and, with --baseline, compares against another git revision:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --baseline HEAD~1 --repeat 7
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODULES = ["backend", "news_scraper", "utils"]
+
+
+def measure(module: str, cwd: Path):
+    """
+    Import `module` once in a fresh interpreter
+
+    Returns:
+        tuple: (cumulative microseconds for the module, {direct import: cumulative us})
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed in {cwd}:\n{proc.stderr[-2000:]}")
+
+    # Entries are printed children-first and nested two spaces per level, so the
+    # module's direct imports are the depth-1 lines just before its own line
+    packages = {}
+    children = {}
+    total = None
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, raw_name = line[len("import time:"):].split("|")
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name] = children.get(name, 0) + int(cumulative)
+        elif depth == 0:
+            if name == module:
+                total = int(cumulative)
+                packages = children
+            children = {}
+    return total, packages
+
+
+def benchmark(cwd: Path, repeat: int):
+    """Median cumulative import time per module, plus the direct imports of the first one"""
+    results = {}
+    heaviest = {}
+    for module in MODULES:
+        runs = [measure(module, cwd) for _ in range(repeat)]
+        results[module] = statistics.median(total for total, _ in runs)
+        if module == MODULES[0]:
+            heaviest = runs[-1][1]
+    return results, heaviest
+
+
+def extract_revision(ref: str, target: Path) -> None:
+    """Write the tree of a git revision into `target`"""
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", ref],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        check=True
+    ).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(target, filter="data")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="git revision to compare against (e.g. HEAD~1)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="heaviest direct imports to list")
+    args = parser.parse_args()
+
+    current, heaviest = benchmark(REPO_ROOT, args.repeat)
+    baseline = None
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            extract_revision(args.baseline, Path(tmp))
+            baseline, _ = benchmark(Path(tmp), args.repeat)
+
+    print(f"{'module':<16}{'current ms':>12}" + (f"{'baseline ms':>14}{'change':>10}" if baseline else ""))
+    for module in MODULES:
+        line = f"{module:<16}{current[module] / 1000:>12.1f}"
+        if baseline:
+            before = baseline[module]
+            line += f"{before / 1000:>14.1f}{(current[module] - before) / before:>+10.0%}"
+        print(line)
+
+    print(f"\nHeaviest direct imports of {MODULES[0]}:")
+    for name, micros in sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<40}{micros / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
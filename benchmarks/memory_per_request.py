@@ -0,0 +1,167 @@
+"""
+Per-request memory benchmark for the crawl stage.
+
+Runs N concurrent topic crawls through the real NewsCrawler and summary-input
+code against synthetic Google News listing pages (no network; BrightData is
+replaced by a page generator) and reports, per concurrency level:
+
+  * tracemalloc peak divided by N (Python heap held per in-flight request)
+  * growth of the process peak RSS, measured in a separate run without tracemalloc
+
+With --baseline the same measurement runs against another git revision:
+
+    python benchmarks/memory_per_request.py
+    python benchmarks/memory_per_request.py --baseline HEAD~1 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from import_time import extract_revision
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+WORDS = "market vote storm launch report court energy talks deal record update city league outage study".split()
+
+
+def synthetic_page(url: str, page_kb: int) -> str:
+    """A listing page shaped like Google News: heavy inline script/style, then headline blocks"""
+    rng = random.Random(url)
+    target = page_kb * 1024
+    head = [
+        "<!DOCTYPE html><html><head><title>News</title>",
+        "<style>", ".c{color:#202124}" * (target // 5 // 17), "</style>",
+        "<script>", "window.wiz_progress&&window.wiz_progress();" * (target // 3 // 43), "</script>",
+        "</head><body><main>",
+    ]
+    size = sum(len(part) for part in head)
+    body = []
+    index = 0
+    while size < target:
+        words = " ".join(rng.choice(WORDS) for _ in range(12))
+        block = (
+            f'<article><h3><a href="./articles/{index}">Headline {index}: {words}</a></h3>'
+            f'<div class="src"><img src="/logo/{index}.png" alt=""><span>Source {index % 40}</span></div>'
+            f'<time datetime="2026-01-01T00:00:00Z">{index % 23 + 1} hours ago</time>'
+            f'<div role="button" aria-label="More">More</div></article>\n'
+        )
+        body.append(block)
+        size += len(block)
+        index += 1
+    return "".join(head + body + ["</main></body></html>"])
+
+
+async def _crawl_all(concurrency: int, pages: int, page_kb: int) -> int:
+    import crawler
+    import news_scraper
+
+    crawler.scrape_with_brightdata = lambda url, timeout=None: synthetic_page(url, page_kb)
+    # One thread per page so every request really is in flight at the same time
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(concurrency * pages))
+
+    async def one_request(index: int) -> str:
+        news_crawler = crawler.NewsCrawler(result_pages=pages, feeds=[], top_k=0, budget_seconds=600)
+        crawl = await news_crawler.crawl(f"topic {index}")
+        return news_scraper._summary_input(crawl)
+
+    scripts = await asyncio.gather(*(one_request(index) for index in range(concurrency)))
+    return sum(len(script.splitlines()) for script in scripts)
+
+
+def run_child(args) -> None:
+    """Measure one configuration inside the tree under test and print JSON"""
+    sys.path.insert(0, os.getcwd())
+    import crawler  # noqa: F401  (keep import cost out of the measurement)
+    import news_scraper  # noqa: F401
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if args.trace:
+        tracemalloc.start()
+    headlines = asyncio.run(_crawl_all(args.concurrency, args.pages, args.page_kb))
+    result = {"headlines": headlines}
+    if args.trace:
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        result["rss_growth_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    print(json.dumps(result))
+
+
+def measure(cwd: Path, concurrency: int, pages: int, page_kb: int, trace: bool) -> dict:
+    proc = subprocess.run(
+        [
+            sys.executable, str(Path(__file__).resolve()), "--child",
+            "--concurrency", str(concurrency), "--pages", str(pages), "--page-kb", str(page_kb),
+            *(["--trace"] if trace else []),
+        ],
+        cwd=cwd,
+        env={**os.environ, "ARCHIVE_ENABLED": "0"},
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark run failed in {cwd}:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def benchmark(cwd: Path, levels, pages: int, page_kb: int) -> dict:
+    """{concurrency: (tracemalloc peak KiB per request, peak RSS growth MiB, headlines)}"""
+    results = {}
+    for concurrency in levels:
+        traced = measure(cwd, concurrency, pages, page_kb, trace=True)
+        rss = measure(cwd, concurrency, pages, page_kb, trace=False)
+        results[concurrency] = (
+            traced["peak_bytes"] / 1024 / concurrency,
+            rss["rss_growth_kb"] / 1024,
+            traced["headlines"],
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="git revision to compare against (e.g. HEAD~1)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="concurrent requests")
+    parser.add_argument("--pages", type=int, default=2, help="result pages crawled per request")
+    parser.add_argument("--page-kb", type=int, default=1024, help="size of each synthetic result page")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.concurrency = args.concurrency[0]
+        return run_child(args)
+
+    current = benchmark(REPO_ROOT, args.concurrency, args.pages, args.page_kb)
+    baseline = None
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            extract_revision(args.baseline, Path(tmp))
+            baseline = benchmark(Path(tmp), args.concurrency, args.pages, args.page_kb)
+
+    print(f"{args.pages} pages x {args.page_kb} KiB per request\n")
+    header = f"{'requests':>8}{'KiB/req':>12}{'RSS MiB':>10}"
+    if baseline:
+        header += f"{'base KiB/req':>14}{'base RSS MiB':>14}{'change':>9}"
+    print(header)
+    for concurrency in args.concurrency:
+        per_request, rss, headlines = current[concurrency]
+        line = f"{concurrency:>8}{per_request:>12.0f}{rss:>10.1f}"
+        if baseline:
+            before, before_rss, before_headlines = baseline[concurrency]
+            line += f"{before:>14.0f}{before_rss:>14.1f}{(per_request - before) / before:>+9.0%}"
+            if headlines != before_headlines:
+                line += f"  (headlines differ: {headlines} vs {before_headlines})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from contextlib import asynccontextmanager
+from html.parser import HTMLParser
+from typing import List, Optional
+from urllib.parse import quote_plus, urlparse
+
+from deadline import get_deadline, MIN_LLM_SECONDS, TTS_RESERVE_SECONDS
+from models import Article, CrawlResult, Headline
+from utils import (
+    generate_news_result_page_urls,
+    scrape_with_brightdata,
+    headlines_from_html,
+    get_http_session
+)
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "InfoSync/1.0 (+news briefing crawler)"
+READ_CHUNK_BYTES = 16 * 1024
+# Google News article links are JS/consent redirects with no publisher text behind them
+UNENRICHABLE_HOSTS = {"news.google.com"}
+
+
+def _env_list(name: str) -> List[str]:
+    return [item.strip() for item in os.getenv(name, "").replace("\n", ",").split(",") if item.strip()]
+
+
+class CrawlBudget:
+    """Per-request limits on crawl time, bytes downloaded and number of fetches"""
+
+    def __init__(self, seconds: float, max_bytes: int, max_requests: int):
+        self.expires_at = time.monotonic() + seconds
+        self.bytes_left = max_bytes
+        self.requests_left = max_requests
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining() <= 0 or self.bytes_left <= 0 or self.requests_left <= 0
+
+    def take_request(self) -> bool:
+        """Reserve one fetch; False once the budget is used up"""
+        if self.exhausted:
+            return False
+        self.requests_left -= 1
+        return True
+
+    def charge(self, nbytes: int) -> None:
+        self.bytes_left -= nbytes
+
+    def timeout(self, cap: float) -> float:
+        return max(0.5, min(cap, self.remaining()))
+
+
+class DomainLimiter:
+    """Politeness limits: at most `per_domain` concurrent fetches and `interval` seconds between starts"""
+
+    def __init__(self, per_domain: int = 2, interval: float = 0.5):
+        self.per_domain = per_domain
+        self.interval = interval
+        self._semaphores = {}
+        self._next_start = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        domain = urlparse(url).netloc.lower()
+        semaphore = self._semaphores.setdefault(domain, asyncio.Semaphore(self.per_domain))
+        async with semaphore:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(domain, now))
+            self._next_start[domain] = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+class LeadParagraphParser(HTMLParser):
+    """
+    Incremental HTML parser that keeps the first few substantial <p> paragraphs.
+
+    Fed chunk by chunk while the body downloads; `done` turns true as soon as
+    enough paragraphs were seen so the caller can stop reading.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "figcaption"}
+
+    def __init__(self, max_paragraphs: int = 3, min_chars: int = 80):
+        super().__init__(convert_charrefs=True)
+        self.max_paragraphs = max_paragraphs
+        self.min_chars = min_chars
+        self.paragraphs = []
+        self._skip_depth = 0
+        self._buffer = None
+
+    @property
+    def done(self) -> bool:
+        return len(self.paragraphs) >= self.max_paragraphs
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "p" and not self._skip_depth:
+            self._buffer = []
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "p" and self._buffer is not None:
+            text = " ".join("".join(self._buffer).split())
+            self._buffer = None
+            if len(text) >= self.min_chars and not self.done:
+                self.paragraphs.append(text)
+
+    def handle_data(self, data):
+        if self._buffer is not None and not self._skip_depth:
+            self._buffer.append(data)
+
+
+def fetch_lead_paragraphs(url: str, timeout: float, max_bytes: int, max_paragraphs: int = 3):
+    """
+    Stream an article page and extract its lead paragraphs
+
+    Returns:
+        tuple: (list of paragraphs, bytes read)
+    """
+    bytes_read = 0
+    parser = LeadParagraphParser(max_paragraphs=max_paragraphs)
+    with get_http_session().get(url, stream=True, timeout=timeout, headers={"User-Agent": USER_AGENT}) as response:
+        response.raise_for_status()
+        if "html" not in response.headers.get("Content-Type", "html"):
+            return [], 0
+        response.encoding = response.encoding or "utf-8"
+        for chunk in response.iter_content(READ_CHUNK_BYTES, decode_unicode=True):
+            bytes_read += len(chunk)
+            parser.feed(chunk)
+            if parser.done or bytes_read >= max_bytes:
+                break
+    return parser.paragraphs, bytes_read
+
+
+def fetch_feed_items(url: str, timeout: float, max_items: int, max_bytes: int):
+    """
+    Stream-parse an RSS or Atom feed
+
+    Returns:
+        tuple: (list of Headline records, bytes read)
+    """
+    items = []
+    source = urlparse(url).netloc.lower()
+    with get_http_session().get(url, stream=True, timeout=timeout, headers={"User-Agent": USER_AGENT}) as response:
+        response.raise_for_status()
+        parser = ET.XMLPullParser(events=("end",))
+        bytes_read = 0
+        for chunk in response.iter_content(READ_CHUNK_BYTES):
+            bytes_read += len(chunk)
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                tag = element.tag.rsplit("}", 1)[-1]
+                if tag not in ("item", "entry"):
+                    continue
+                title, link = None, None
+                for child in element:
+                    child_tag = child.tag.rsplit("}", 1)[-1]
+                    if child_tag == "title":
+                        title = (child.text or "").strip()
+                    elif child_tag == "link" and link is None:
+                        # RSS puts the URL in the text, Atom in href
+                        link = (child.get("href") or child.text or "").strip() or None
+                element.clear()
+                if title:
+                    items.append(Headline(title, source, link))
+                if len(items) >= max_items:
+                    return items, bytes_read
+            if bytes_read >= max_bytes:
+                break
+    return items, bytes_read
+
+
+class NewsCrawler:
+    """
+    Crawl stage for one topic: several Google News listings plus extra RSS/Atom
+    feeds fetched concurrently, then optional lead-paragraph enrichment of the
+    top-K feed articles. Everything is bounded by a per-request CrawlBudget.
+
+    Configuration (environment):
+        NEWS_RESULT_PAGES: Google News listings per topic (1-3, default 2)
+        NEWS_FEEDS: comma-separated feed URL templates with a {query} placeholder
+        NEWS_ARTICLE_TOP_K: article bodies to enrich per topic (default 3, 0 disables)
+        CRAWL_BUDGET_SECONDS / CRAWL_MAX_BYTES / CRAWL_MAX_REQUESTS: per-topic budget
+    """
+
+    def __init__(
+        self,
+        result_pages: Optional[int] = None,
+        feeds: Optional[List[str]] = None,
+        top_k: Optional[int] = None,
+        budget_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_requests: Optional[int] = None,
+        domain_limiter: Optional[DomainLimiter] = None
+    ):
+        self.result_pages = result_pages if result_pages is not None else int(os.getenv("NEWS_RESULT_PAGES", "2"))
+        self.feeds = feeds if feeds is not None else _env_list("NEWS_FEEDS")
+        self.top_k = top_k if top_k is not None else int(os.getenv("NEWS_ARTICLE_TOP_K", "3"))
+        self.budget_seconds = budget_seconds or float(os.getenv("CRAWL_BUDGET_SECONDS", "45"))
+        self.max_bytes = max_bytes or int(os.getenv("CRAWL_MAX_BYTES", str(8 * 1024 * 1024)))
+        self.max_requests = max_requests or int(os.getenv("CRAWL_MAX_REQUESTS", "20"))
+        self.max_feed_items = 20
+        self.article_max_bytes = 256 * 1024
+        self.domain_limiter = domain_limiter or DomainLimiter()
+
+    def _budget(self) -> CrawlBudget:
+        seconds = self.budget_seconds
+        deadline = get_deadline()
+        if deadline:
+            # Never let the crawl eat the time reserved for summarization and TTS
+            seconds = min(seconds, deadline.remaining() - MIN_LLM_SECONDS - TTS_RESERVE_SECONDS)
+        return CrawlBudget(max(seconds, 0.0), self.max_bytes, self.max_requests)
+
+    async def _gather_within(self, coroutines, budget: CrawlBudget) -> list:
+        """Run fetches concurrently; whatever has not finished when the budget runs out is cancelled"""
+        tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=budget.remaining())
+        for task in pending:
+            task.cancel()
+        results = []
+        for task in tasks:
+            if task in done and task.exception() is None:
+                results.append(task.result())
+            else:
+                if task in done:
+                    logger.warning(f"Crawl fetch failed: {task.exception()}")
+                results.append(None)
+        return results
+
+    async def _fetch_result_page(self, url: str, budget: CrawlBudget) -> List[Headline]:
+        if not budget.take_request():
+            return []
+        html = await asyncio.to_thread(scrape_with_brightdata, url, budget.timeout(60))
+        budget.charge(len(html))
+        titles = await asyncio.to_thread(headlines_from_html, html, url)
+        # The raw page is by far the largest object of a request; drop it before anything else runs
+        del html
+        # Fall back to the listing URL when a headline has no article link
+        return [Headline(title, "google_news", link or url) for title, link in titles]
+
+    async def _fetch_feed(self, url: str, budget: CrawlBudget) -> List[Headline]:
+        if not budget.take_request():
+            return []
+        async with self.domain_limiter.slot(url):
+            items, nbytes = await asyncio.to_thread(
+                fetch_feed_items, url, budget.timeout(15), self.max_feed_items, budget.bytes_left
+            )
+        budget.charge(nbytes)
+        return items
+
+    async def _fetch_article(self, headline: Headline, budget: CrawlBudget) -> Optional[Article]:
+        if not budget.take_request():
+            return None
+        async with self.domain_limiter.slot(headline.url):
+            paragraphs, nbytes = await asyncio.to_thread(
+                fetch_lead_paragraphs,
+                headline.url,
+                budget.timeout(10),
+                min(self.article_max_bytes, max(budget.bytes_left, 0))
+            )
+        budget.charge(nbytes)
+        if not paragraphs:
+            return None
+        return Article(headline.title, headline.url, " ".join(paragraphs))
+
+    async def crawl(self, topic: str) -> CrawlResult:
+        """
+        Crawl all configured sources for a topic
+
+        Returns:
+            CrawlResult: Deduplicated headlines and the enriched articles
+        """
+        budget = self._budget()
+        query = quote_plus(topic)
+        listings = [self._fetch_result_page(url, budget) for url in generate_news_result_page_urls(topic, self.result_pages)]
+        listings += [self._fetch_feed(template.replace("{query}", query), budget) for template in self.feeds]
+
+        result = CrawlResult()
+        seen = set()
+        for entries in await self._gather_within(listings, budget):
+            for entry in entries or []:
+                key = entry.title.casefold()
+                if key not in seen:
+                    seen.add(key)
+                    result.headlines.append(entry)
+
+        if self.top_k > 0 and not budget.exhausted:
+            # Only publisher pages have lead paragraphs; this also skips listing-URL fallbacks
+            candidates = [
+                h for h in result.headlines
+                if h.url and urlparse(h.url).netloc.lower() not in UNENRICHABLE_HOSTS
+            ][:self.top_k]
+            fetched = await self._gather_within([self._fetch_article(h, budget) for h in candidates], budget)
+            result.articles = [article for article in fetched if article]
+
+        return result
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "240"))
+# Largest deadline a client may ask for; per-chunk audio must outlive any running request
+MAX_DEADLINE_SECONDS = float(os.getenv("REQUEST_MAX_DEADLINE_SECONDS", "540"))
+# Time kept back for text-to-speech once the script is written
+TTS_RESERVE_SECONDS = float(os.getenv("DEADLINE_TTS_RESERVE_SECONDS", "20"))
+# Below this much LLM budget, fall back to a headlines-only script
+MIN_LLM_SECONDS = float(os.getenv("DEADLINE_MIN_LLM_SECONDS", "15"))
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage is started after the request deadline has passed"""
+    pass
+
+
+class RequestCancelled(Exception):
+    """Raised in a worker thread when the request it works for was cancelled"""
+    pass
+
+
+class Deadline:
+    """Absolute time budget for one request, shared by every pipeline stage"""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Tell blocking calls still running for this request to stop
+
+        Cancelling the asyncio task does not stop a thread started with
+        asyncio.to_thread; streaming calls poll this flag instead.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def has_budget_for(self, seconds: float) -> bool:
+        """Whether a stage needing `seconds` can still finish in time"""
+        return self.remaining() >= seconds
+
+    def timeout(self, cap: float, reserve: float = 0.0) -> float:
+        """
+        Timeout for a blocking call: the smaller of `cap` and the remaining budget
+
+        Args:
+            cap: The stage's own maximum timeout
+            reserve: Seconds to keep back for later stages
+
+        Raises:
+            DeadlineExceeded: If no budget is left for this call
+        """
+        available = self.remaining() - reserve
+        if available <= 0:
+            raise DeadlineExceeded(f"Request deadline of {self.budget:.0f}s exceeded")
+        return min(cap, available)
+
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+
+def get_deadline() -> Optional[Deadline]:
+    """Deadline of the request being served in this context, if any"""
+    return current_deadline.get()
+
+
+def raise_if_cancelled() -> None:
+    """
+    Stop a blocking call once the request it works for has been cancelled
+
+    Raises:
+        RequestCancelled: If the current request has been cancelled
+    """
+    deadline = current_deadline.get()
+    if deadline is not None and deadline.cancelled:
+        raise RequestCancelled("Request cancelled")
+
+
+def stage_timeout(cap: float, reserve: float = 0.0) -> float:
+    """Timeout for a stage call, bounded by the current request deadline when one is set"""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return cap
+    return deadline.timeout(cap, reserve=reserve)
@@ -1,9 +1,10 @@
 import streamlit as st
 import requests
-from typing import Literal
-import time
 from datetime import datetime
+from collections import OrderedDict
 import json
+import threading
+import time
 
 # Page config
 st.set_page_config(
@@ -134,14 +135,141 @@ st.markdown("""
 # Constants
 BACKEND_URL = "http://localhost:8000"
 SOURCE_TYPES = ["both", "news", "reddit"]
+STREAM_IDLE_TIMEOUT = 330  # seconds to wait between events (one Ollama call can take 300s)
+BRIEFING_CACHE_TTL = 15 * 60  # seconds a generated briefing is reused for the same request
+AUDIO_CACHE_TTL = 60 * 60  # seconds downloaded audio stays in the Streamlit cache
+
+STAGE_MESSAGES = {
+    "scraping": "📡 Fetching {source} data{topic_suffix}...",
+    "headlines_extracted": "📰 Extracted {count} headlines for {topic}",
+    "topic_summarized": "✍️ Summarized news for {topic}",
+    "topic_failed": "⚠️ Could not fetch news for {topic}",
+    "summarizing": "🤖 Generating summary with AI...",
+    "summary_done": "✅ Summary ready, converting to audio...",
+    "tts_chunk": "🎵 Converting to audio (chunk {chunk} of {total})...",
+}
+
+
+def iter_sse_events(response):
+    """Parse a streaming Server-Sent Events response into event dicts"""
+    data_lines = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line:
+            if line.startswith("data:"):
+                data_lines.append(line[5:].strip())
+        elif data_lines:
+            yield json.loads("\n".join(data_lines))
+            data_lines = []
+
+
+def describe_stage(event):
+    """Human-readable status line for a backend stage event"""
+    template = STAGE_MESSAGES.get(event.get("stage"), "🔄 Processing...")
+    fields = {"source": "", "topic": "", "count": 0, "chunk": 0, "total": 0, **event}
+    fields["topic_suffix"] = f" for {fields['topic']}" if fields["topic"] else ""
+    return template.format(**fields)
+
+
+@st.cache_resource
+def get_http_session():
+    """One pooled HTTP session shared by every session of this Streamlit server"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=AUDIO_CACHE_TTL, max_entries=32, show_spinner=False)
+def fetch_audio(audio_id):
+    """Download a briefing by its server-side content hash (cached, evicted after the TTL)"""
+    response = get_http_session().get(f"{BACKEND_URL}/audio/{audio_id}.mp3", timeout=30)
+    response.raise_for_status()
+    return response.content
+
+
+class BriefingCache:
+    """Maps topics + source_type to the audio hash of a recent briefing, with TTL eviction"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(topics, source_type):
+        return tuple(sorted(topic.strip().lower() for topic in topics)), source_type
+
+    def get(self, topics, source_type):
+        key = self._key(topics, source_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            audio_id, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return audio_id
+
+    def put(self, topics, source_type, audio_id):
+        with self._lock:
+            self._entries[self._key(topics, source_type)] = (audio_id, time.monotonic())
+            self._entries.move_to_end(self._key(topics, source_type))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, topics, source_type):
+        with self._lock:
+            self._entries.pop(self._key(topics, source_type), None)
+
+
+@st.cache_resource
+def get_briefing_cache():
+    """Briefing cache shared across sessions so identical requests skip the backend"""
+    return BriefingCache(ttl=BRIEFING_CACHE_TTL, max_entries=128)
+
+
+def render_briefing(audio_id, key):
+    """Audio player and download button for a briefing stored on the backend"""
+    try:
+        audio_bytes = fetch_audio(audio_id)
+    except requests.exceptions.RequestException:
+        st.warning("⚠️ This briefing is no longer available on the server.")
+        return
+    st.audio(audio_bytes, format="audio/mpeg")
+    st.download_button(
+        "⬇️ Download MP3",
+        data=audio_bytes,
+        file_name=f"infosync_{audio_id[:12]}.mp3",
+        mime="audio/mpeg",
+        key=f"download_{key}"
+    )
+
+
+def regenerate_briefing(topics, source_type):
+    """Drop the cached briefing and ask the next run to generate a fresh one"""
+    get_briefing_cache().invalidate(topics, source_type)
+    st.session_state.regenerate = True
+
+
+def start_new_topics():
+    st.session_state.topics = []
+    st.session_state.current_audio_id = None
 
 # Initialize session state
 if 'topics' not in st.session_state:
     st.session_state.topics = []
 if 'history' not in st.session_state:
     st.session_state.history = []
-if 'current_audio' not in st.session_state:
-    st.session_state.current_audio = None
+if 'current_audio_id' not in st.session_state:
+    st.session_state.current_audio_id = None
+if 'replay_audio_id' not in st.session_state:
+    st.session_state.replay_audio_id = None
+if 'regenerate' not in st.session_state:
+    st.session_state.regenerate = False
 
 # Header
 st.markdown("""
@@ -244,81 +372,99 @@ with tab1:
             key="generate_btn"
         )
     
-    if generate_button:
+    # Set by the Regenerate button's callback; consumed by this run
+    regenerate = st.session_state.regenerate
+    st.session_state.regenerate = False
+    
+    if generate_button or regenerate:
         if not st.session_state.topics:
             st.error("❌ Please add at least one topic")
         else:
             progress_placeholder = st.empty()
             status_placeholder = st.empty()
+            partial_audio_placeholder = st.empty()
+            briefing_cache = get_briefing_cache()
             
             try:
-                with st.spinner("🔄 Processing... This may take a minute"):
-                    # Show progress
+                audio_id = briefing_cache.get(st.session_state.topics, source_type)
+                served_from_cache = audio_id is not None
+                final_event = None
+                
+                if not served_from_cache:
                     progress_bar = progress_placeholder.progress(0)
+                    status_placeholder.info("📡 Connecting to backend...")
                     
-                    status_placeholder.info("📡 Fetching data from sources...")
-                    progress_bar.progress(25)
+                    # Partial chunks only live for the duration of this run
+                    audio_chunks = []
                     
-                    time.sleep(0.5)
-                    
-                    status_placeholder.info("🤖 Generating summary with AI...")
-                    progress_bar.progress(50)
-                    
-                    # Make API call
-                    response = requests.post(
-                        f"{BACKEND_URL}/generate-news-audio",
+                    # Stream real stage events from the backend instead of one blocking call
+                    with get_http_session().post(
+                        f"{BACKEND_URL}/generate-news-audio/stream",
                         json={
                             "topics": st.session_state.topics,
                             "source_type": source_type
                         },
-                        timeout=120
-                    )
+                        stream=True,
+                        timeout=(10, STREAM_IDLE_TIMEOUT)
+                    ) as response:
+                        if response.status_code != 200:
+                            final_event = {"stage": "error", "detail": response.json().get('detail', 'Unknown error')}
+                        else:
+                            for event in iter_sse_events(response):
+                                stage = event.get("stage")
+                                if event.get("progress") is not None:
+                                    progress_bar.progress(min(int(event["progress"]), 100))
+                                
+                                if stage in ("error", "done"):
+                                    final_event = event
+                                    break
+                                
+                                status_placeholder.info(describe_stage(event))
+                                
+                                if stage == "tts_chunk":
+                                    chunk = get_http_session().get(f"{BACKEND_URL}{event['audio_url']}", timeout=30)
+                                    chunk.raise_for_status()
+                                    audio_chunks.append(chunk.content)
+                                    # Partial audio is playable while later chunks are synthesized
+                                    with partial_audio_placeholder.container():
+                                        st.markdown(f"### 🎧 Partial Audio ({event['chunk']}/{event['total']})")
+                                        partial_audio = b"".join(audio_chunks)
+                                        st.audio(partial_audio, format="audio/mpeg")
+                                        st.download_button(
+                                            "⬇️ Download Partial MP3",
+                                            data=partial_audio,
+                                            file_name="infosync_partial.mp3",
+                                            mime="audio/mpeg",
+                                            key=f"partial_download_{event['chunk']}"
+                                        )
                     
-                    progress_bar.progress(75)
-                    status_placeholder.info("🎵 Converting to audio...")
+                    if final_event and final_event["stage"] == "done":
+                        audio_id = final_event["audio_id"]
+                        briefing_cache.put(st.session_state.topics, source_type, audio_id)
+                
+                progress_placeholder.empty()
+                status_placeholder.empty()
+                partial_audio_placeholder.empty()
+                
+                if audio_id:
+                    st.session_state.current_audio_id = audio_id
                     
-                    if response.status_code == 200:
-                        progress_bar.progress(100)
-                        progress_placeholder.empty()
-                        status_placeholder.empty()
-                        
-                        st.session_state.current_audio = response.content
-                        
-                        # Add to history
-                        st.session_state.history.append({
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "topics": st.session_state.topics.copy(),
-                            "source_type": source_type
-                        })
-                        
-                        st.success("✅ Audio generated successfully!")
-                        
-                        # Display audio player
-                        st.markdown("### 🎧 Audio Summary")
-                        st.audio(st.session_state.current_audio, format="audio/mpeg")
-                        
-                        # Download button
-                        col1, col2, col3 = st.columns([1, 1, 2])
-                        with col1:
-                            st.download_button(
-                                "⬇️ Download MP3",
-                                data=st.session_state.current_audio,
-                                file_name=f"infosync_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3",
-                                mime="audio/mpeg",
-                                use_container_width=True
-                            )
-                        with col2:
-                            if st.button("🔄 Regenerate", use_container_width=True):
-                                st.rerun()
-                        
-                        # Clear topics after successful generation
-                        if st.button("➕ Analyze New Topics", use_container_width=True):
-                            st.session_state.topics = []
-                            st.session_state.current_audio = None
-                            st.rerun()
+                    # Add to history
+                    st.session_state.history.append({
+                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        "topics": st.session_state.topics.copy(),
+                        "source_type": source_type,
+                        "audio_id": audio_id
+                    })
+                    
+                    if served_from_cache:
+                        st.success("⚡ Served a recent briefing for these topics from cache!")
                     else:
-                        progress_placeholder.empty()
-                        st.error(f"❌ Error: {response.json().get('detail', 'Unknown error')}")
+                        st.success("✅ Audio generated successfully!")
+                elif final_event and final_event["stage"] == "error":
+                    st.error(f"❌ Error: {final_event.get('detail', 'Unknown error')}")
+                else:
+                    st.error("❌ Backend closed the stream before the audio was ready.")
                         
             except requests.exceptions.Timeout:
                 progress_placeholder.empty()
@@ -329,6 +475,24 @@ with tab1:
             except Exception as e:
                 progress_placeholder.empty()
                 st.error(f"❌ Error: {str(e)}")
+    
+    # Rendered on every run (not just the generating one) so the buttons below keep working
+    if st.session_state.current_audio_id:
+        st.markdown("### 🎧 Audio Summary")
+        render_briefing(st.session_state.current_audio_id, key="current")
+        
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col2:
+            st.button(
+                "🔄 Regenerate",
+                use_container_width=True,
+                disabled=not st.session_state.topics,
+                on_click=regenerate_briefing,
+                args=(list(st.session_state.topics), source_type)
+            )
+        
+        # Clear topics after successful generation
+        st.button("➕ Analyze New Topics", use_container_width=True, on_click=start_new_topics)
 
 # Tab 2: History
 with tab2:
@@ -344,9 +508,15 @@ with tab2:
                     📡 Source: {item['source_type'].upper()}
                 </div>
                 """, unsafe_allow_html=True)
+                if item.get("audio_id"):
+                    if st.button("▶️ Replay", key=f"replay_{idx}"):
+                        st.session_state.replay_audio_id = item["audio_id"]
+                    if st.session_state.replay_audio_id == item["audio_id"]:
+                        render_briefing(item["audio_id"], key=f"history_{idx}")
         
         if st.button("🗑️ Clear History", use_container_width=True):
             st.session_state.history = []
+            st.session_state.replay_audio_id = None
             st.rerun()
     else:
         st.info("📭 No history yet. Generate your first summary to see it here!")
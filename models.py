@@ -1,7 +1,45 @@
-from pydantic import BaseModel
-from typing import List
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+from deadline import MAX_DEADLINE_SECONDS
 
 
 class NewsRequest(BaseModel):
     topics: List[str]
-    source_type: str
\ No newline at end of file
+    source_type: str
+    deadline_seconds: Optional[float] = Field(None, gt=0, le=MAX_DEADLINE_SECONDS)
+    priority: Literal["interactive", "batch"] = "interactive"
+
+
+# Internal pipeline records. Slotted dataclasses carry no per-instance
+# __dict__, which keeps the many small objects built per request compact.
+
+@dataclass(slots=True)
+class Headline:
+    title: str
+    source: str
+    url: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Article:
+    title: str
+    url: str
+    lead: str
+
+
+@dataclass(slots=True)
+class CrawlResult:
+    """Everything the crawl stage found for one topic"""
+    headlines: List[Headline] = field(default_factory=list)
+    articles: List[Article] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class TopicResult:
+    """Per-topic content handed from the scrapers to the script writer"""
+    topic: str
+    news: str = ""
+    discussion: str = ""
@@ -1,52 +1,116 @@
 import asyncio
+import logging
 import os
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 
+import requests
 from aiolimiter import AsyncLimiter
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
-from langchain_anthropic import ChatAnthropic
-from langgraph.prebuilt import create_react_agent
-from dotenv import load_dotenv
+from tenacity import retry, stop_after_attempt, wait_exponential
 
+from admission import admission_controller, AdmissionRejected
+from archive import get_archive
+from crawler import NewsCrawler
+from deadline import DeadlineExceeded, get_deadline, MIN_LLM_SECONDS, TTS_RESERVE_SECONDS
+from models import CrawlResult
 from utils import (
-    generate_news_urls_to_scrape,
-    scrape_with_brightdata,
-    clean_html_to_text,
-    extract_headlines,
-    summarize_with_anthropic_news_script,
-    summarize_with_ollama
+    headlines_to_script,
+    summarize_with_anthropic_news_script
 )
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from langchain_mcp_adapters.tools import load_mcp_tools
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+def _summary_input(crawl: CrawlResult) -> str:
+    """Headlines, followed by lead paragraphs of the enriched articles"""
+    text = "\n".join(headline.title for headline in crawl.headlines)
+    if crawl.articles:
+        leads = "\n".join(f"{article.title}: {article.lead}" for article in crawl.articles)
+        text += f"\n\nArticle leads:\n{leads}"
+    return text
 
 
 class NewsScraper:
     _rate_limiter = AsyncLimiter(5, 1)  # 5 requests/second
 
+    def __init__(self, crawler: Optional[NewsCrawler] = None):
+        self.crawler = crawler or NewsCrawler()
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10)
     )
-    async def scrape_news(self, topics: List[str]) -> Dict[str, str]:
-        """Scrape and analyze news articles"""
+    async def scrape_news(
+        self,
+        topics: List[str],
+        on_event: Optional[Callable[..., None]] = None
+    ) -> Dict[str, str]:
+        """
+        Scrape and analyze news articles
+
+        Args:
+            topics: Topics to search for
+            on_event: Optional callback called as on_event(stage, **data) as each
+                topic moves through scraping and summarization
+
+        Returns:
+            dict: {"news_analysis": {topic: summary}}
+        """
         results = {}
+        emit = on_event or (lambda stage, **data: None)
+        
+        deadline = get_deadline()
+        # Budget a topic needs to still be scraped and summarized in time
+        llm_budget = MIN_LLM_SECONDS + TTS_RESERVE_SECONDS
+        # A topic summary gets its own LLM time on top of what the broadcast call needs
+        summary_budget = llm_budget + MIN_LLM_SECONDS
         
         for topic in topics:
+            if deadline and not deadline.has_budget_for(llm_budget):
+                emit("topic_skipped", topic=topic, reason="deadline")
+                results[topic] = ""
+                continue
             async with self._rate_limiter:
                 try:
-                    urls = generate_news_urls_to_scrape([topic])
-                    search_html = scrape_with_brightdata(urls[topic])
-                    clean_text = clean_html_to_text(search_html)
-                    headlines = extract_headlines(clean_text)
-                    summary = summarize_with_anthropic_news_script(
-                        api_key=os.getenv("ANTHROPIC_API_KEY"),
-                        headlines=headlines
+                    emit("scraping", topic=topic)
+                    crawl = await self.crawler.crawl(topic)
+                    if not crawl.headlines:
+                        raise RuntimeError(f"No headlines found for {topic}")
+                    emit(
+                        "headlines_extracted",
+                        topic=topic,
+                        count=len(crawl.headlines),
+                        articles=len(crawl.articles)
                     )
+                    archive = get_archive()
+                    if archive:
+                        for headline in crawl.headlines:
+                            archive.add_headlines(topic, headline.source, headline.url, [headline.title])
+                    # The degraded script reads titles only; article leads are for the LLM
+                    titles = "\n".join(headline.title for headline in crawl.headlines)
+                    headlines = _summary_input(crawl)
+                    del crawl
+                    summary = None
+                    if not deadline or deadline.has_budget_for(summary_budget):
+                        try:
+                            async with admission_controller.stage("summarize", reserve=summary_budget):
+                                summary = await asyncio.to_thread(
+                                    summarize_with_anthropic_news_script,
+                                    api_key=os.getenv("ANTHROPIC_API_KEY"),
+                                    headlines=headlines
+                                )
+                        except AdmissionRejected:
+                            logger.info(f"Ollama saturated, headlines-only summary for {topic}")
+                        except (DeadlineExceeded, requests.exceptions.Timeout) as e:
+                            logger.warning(f"Summary for {topic} ran out of time: {str(e)}")
+                    if summary is None:
+                        # Out of time for Ollama: read the headlines themselves
+                        summary = headlines_to_script(topic, titles)
+                        emit("topic_summarized", topic=topic, degraded=True)
+                    else:
+                        emit("topic_summarized", topic=topic)
                     results[topic] = summary
                 except Exception as e:
+                    emit("topic_failed", topic=topic, error=str(e))
                     results[topic] = f"Error: {str(e)}"
                 await asyncio.sleep(1)  # Avoid overwhelming news sites
 
@@ -0,0 +1,181 @@
+import asyncio
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+# Rolling whole-process sampler; 0 disables it
+PROFILE_SAMPLE_HZ = float(os.getenv("PROFILE_SAMPLE_HZ", "0"))
+PROFILE_WINDOW_SECONDS = float(os.getenv("PROFILE_WINDOW_SECONDS", "60"))
+PROFILE_KEEP_WINDOWS = int(os.getenv("PROFILE_KEEP_WINDOWS", "60"))
+# Sampling rate for on-demand (single request / admin) captures
+PROFILE_REQUEST_HZ = float(os.getenv("PROFILE_REQUEST_HZ", "200"))
+# Shared secret for the X-Profile-Token header and the admin endpoints; unset disables both
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def token_matches(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+class StackSampler:
+    """
+    Low-overhead sampling profiler for every thread in the process.
+
+    A daemon thread snapshots all Python stacks with sys._current_frames()
+    `hz` times per second and counts them as folded stacks
+    ("thread;outer;...;inner count"), the input format of flamegraph.pl,
+    speedscope and inferno.
+    """
+
+    def __init__(self, hz: float):
+        self.interval = 1.0 / hz
+        self.samples = 0
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+            self._after_sample()
+
+    def _after_sample(self) -> None:
+        pass
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            frames.append(names.get(ident, f"thread-{ident}"))
+            stacks.append(";".join(reversed(frames)))
+        with self._lock:
+            self._counts.update(stacks)
+            self.samples += 1
+
+    def take(self) -> Counter:
+        """Return the counts collected so far and start a fresh window"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return counts
+
+
+def format_folded(counts: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def save_profile(counts: Counter, name: str) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / name
+    path.write_text(format_folded(counts))
+    return path
+
+
+def list_profiles() -> List[str]:
+    if not PROFILE_DIR.is_dir():
+        return []
+    return sorted((p.name for p in PROFILE_DIR.glob("*.folded")), reverse=True)
+
+
+def new_profile_name(kind: str) -> str:
+    return f"{kind}-{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:6]}.folded"
+
+
+class RollingProfiler(StackSampler):
+    """Whole-process sampler that writes one folded file per window and keeps the newest N"""
+
+    def __init__(self, hz: float, window_seconds: float, keep: int):
+        super().__init__(hz)
+        self.window_seconds = window_seconds
+        self.keep = keep
+        self._window_started = time.monotonic()
+
+    def _after_sample(self) -> None:
+        if time.monotonic() - self._window_started >= self.window_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        self._window_started = time.monotonic()
+        counts = self.take()
+        if not counts:
+            return
+        try:
+            save_profile(counts, new_profile_name("rolling"))
+            for old in sorted(PROFILE_DIR.glob("rolling-*.folded"))[:-self.keep]:
+                old.unlink()
+        except OSError as e:
+            logger.warning(f"Could not write rolling profile: {str(e)}")
+
+    def stop(self) -> None:
+        super().stop()
+        self.flush()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware: a request carrying a valid X-Profile-Token header is
+    sampled at PROFILE_REQUEST_HZ from its first byte until its response body
+    (including SSE streams) is finished. The folded profile is written to
+    PROFILE_DIR and its file name returned in the X-Profile-Id header.
+
+    The sampler sees every thread, so work from concurrent requests shows up
+    too; only one request is profiled at a time to bound the overhead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMIN_TOKEN:
+            return await self.app(scope, receive, send)
+        token = dict(scope["headers"]).get(b"x-profile-token")
+        if not token_matches(token.decode("latin-1") if token else None) or not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        name = new_profile_name("request")
+        sampler = StackSampler(PROFILE_REQUEST_HZ).start()
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", name.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            # Joining the sampler and writing the file block, so keep them off the event loop
+            try:
+                await asyncio.to_thread(sampler.stop)
+            finally:
+                self._busy.release()
+            await asyncio.to_thread(save_profile, sampler.take(), name)
+            logger.info(f"Saved request profile {name} ({sampler.samples} samples)")
@@ -0,0 +1,231 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+import crawler
+from crawler import DomainLimiter, NewsCrawler
+
+LONG = "This paragraph is long enough to count as a lead paragraph of the article body text. "
+
+
+def article_page(name: str) -> str:
+    return (
+        "<html><head><script>var p = '<p>not a paragraph</p>';</script></head><body>"
+        "<nav><p>" + LONG + "navigation</p></nav>"
+        "<p>Too short.</p>"
+        f"<p>{name} first: {LONG}</p>"
+        f"<p>{name} second: {LONG}</p>"
+        f"<p>{name} third: {LONG}</p>"
+        f"<p>{name} fourth: {LONG}</p>"
+        "</body></html>"
+    )
+
+
+def rss_feed(base: str) -> str:
+    items = [("Alpha rises", "/article/alpha"), ("Shared story", "/article/shared"), ("Beta falls", "/article/beta")]
+    entries = "".join(f"<item><title>{title}</title><link>{base}{path}</link></item>" for title, path in items)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>{entries}</channel></rss>'
+
+
+def atom_feed(base: str) -> str:
+    items = [("ALPHA RISES", "/article/alpha-copy"), ("Gamma holds", "/article/gamma")]
+    entries = "".join(f'<entry><title>{title}</title><link href="{base}{path}"/></entry>' for title, path in items)
+    return f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'
+
+
+GOOGLE_READ_HREF = "./read/CBMiSWh0dHBzOi8vZXhhbXBsZS5jb20"
+GOOGLE_READ_URL = "https://news.google.com/read/CBMiSWh0dHBzOi8vZXhhbXBsZS5jb20"
+
+
+def listing_page(base: str) -> str:
+    # Real listings link through Google's own relative ./read/ redirects
+    blocks = [
+        ("Google hosted", GOOGLE_READ_HREF),
+        ("Shared story", f"{base}/article/listing-shared"),
+        ("Listing exclusive", f"{base}/article/exclusive"),
+    ]
+    return "<html><body>" + "".join(
+        f'<article><a href="{href}">{title}</a><span>Source</span><div>More</div></article>'
+        for title, href in blocks
+    ) + "</body></html>"
+
+
+class FixtureServer:
+    """Serves feeds and article pages and records when each request started"""
+
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.delays = {}
+        self._lock = threading.Lock()
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                with fixture._lock:
+                    fixture.requests.append((path, time.monotonic()))
+                    fixture.active += 1
+                    fixture.max_active = max(fixture.max_active, fixture.active)
+                try:
+                    time.sleep(fixture.delays.get(path, 0.05))
+                    if path == "/rss":
+                        body, content_type = rss_feed(fixture.base), "application/rss+xml"
+                    elif path == "/atom":
+                        body, content_type = atom_feed(fixture.base), "application/atom+xml"
+                    elif path.startswith("/article/"):
+                        body, content_type = article_page(path.rsplit("/", 1)[-1]), "text/html; charset=utf-8"
+                    else:
+                        self.send_error(404)
+                        return
+                    data = body.encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with fixture._lock:
+                        fixture.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def paths(self):
+        return [path for path, _ in self.requests]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fixture = FixtureServer()
+    thread = threading.Thread(target=fixture.httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    # Google News listings normally come through BrightData
+    monkeypatch.setattr(crawler, "scrape_with_brightdata", lambda url, timeout=None: listing_page(fixture.base))
+    yield fixture
+    fixture.httpd.shutdown()
+    fixture.httpd.server_close()
+
+
+def make_crawler(server, **kwargs):
+    options = {
+        "result_pages": 1,
+        "feeds": [f"{server.base}/rss?q={{query}}", f"{server.base}/atom?q={{query}}"],
+        "top_k": 0,
+        "domain_limiter": DomainLimiter(per_domain=4, interval=0),
+    }
+    options.update(kwargs)
+    return NewsCrawler(**options)
+
+
+def test_crawl_merges_sources_and_deduplicates_headlines(server):
+    result = asyncio.run(make_crawler(server).crawl("markets"))
+
+    assert [h.title for h in result.headlines] == [
+        "Google hosted", "Shared story", "Listing exclusive", "Alpha rises", "Beta falls", "Gamma holds"
+    ]
+    sources = {h.title: h.source for h in result.headlines}
+    assert sources["Shared story"] == "google_news"
+    assert sources["Alpha rises"] == urlparse(server.base).netloc
+    # Listing headlines keep their article link (resolved against the listing) instead of the listing URL
+    assert result.headlines[0].url == GOOGLE_READ_URL
+    assert result.headlines[1].url == f"{server.base}/article/listing-shared"
+    assert result.articles == []
+
+
+def test_crawl_enriches_top_k_articles_with_lead_paragraphs(server, monkeypatch):
+    fetched = []
+    fetch_lead_paragraphs = crawler.fetch_lead_paragraphs
+
+    def recording_fetch(url, *args, **kwargs):
+        fetched.append(url)
+        return fetch_lead_paragraphs(url, *args, **kwargs)
+
+    monkeypatch.setattr(crawler, "fetch_lead_paragraphs", recording_fetch)
+    result = asyncio.run(make_crawler(server, top_k=3).crawl("markets"))
+
+    # Google News redirect links are never fetched, so they don't use up the top K
+    assert GOOGLE_READ_URL not in fetched
+    assert len(fetched) == 3
+    assert [a.url for a in result.articles] == [
+        f"{server.base}/article/listing-shared",
+        f"{server.base}/article/exclusive",
+        f"{server.base}/article/alpha",
+    ]
+    lead = result.articles[0].lead
+    assert lead.startswith("listing-shared first:")
+    assert "listing-shared third:" in lead
+    # Three paragraphs at most, skipping navigation, scripts and short paragraphs
+    assert "fourth" not in lead
+    assert "navigation" not in lead and "not a paragraph" not in lead and "Too short" not in lead
+    assert server.paths().count("/article/beta") == 0
+
+
+def test_crawl_stops_at_max_requests(server):
+    result = asyncio.run(make_crawler(server, top_k=3, max_requests=2).crawl("markets"))
+
+    # The listing and the first feed use up the budget; the Atom feed and articles are never fetched
+    assert server.paths() == ["/rss"]
+    assert [h.title for h in result.headlines] == [
+        "Google hosted", "Shared story", "Listing exclusive", "Alpha rises", "Beta falls"
+    ]
+    assert result.articles == []
+
+
+def test_crawl_stops_at_max_bytes(server):
+    max_bytes = len(listing_page(server.base)) + len(rss_feed(server.base)) + len(atom_feed(server.base))
+    result = asyncio.run(make_crawler(server, top_k=3, max_bytes=max_bytes).crawl("markets"))
+
+    assert len(result.headlines) == 6
+    assert result.articles == []
+    assert not any(path.startswith("/article/") for path in server.paths())
+
+
+def test_crawl_returns_what_finished_within_its_time_budget(server):
+    server.delays["/atom"] = 3.0
+    started = time.monotonic()
+    result = asyncio.run(make_crawler(server, top_k=3, budget_seconds=0.5).crawl("markets"))
+
+    assert time.monotonic() - started < 2.0
+    assert "Gamma holds" not in [h.title for h in result.headlines]
+    assert "Alpha rises" in [h.title for h in result.headlines]
+    assert result.articles == []
+
+
+class RecordingLimiter(DomainLimiter):
+    """DomainLimiter that notes when each fetch is let through"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.starts = []
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        async with super().slot(url):
+            self.starts.append(time.monotonic())
+            yield
+
+
+def test_domain_limiter_spaces_and_caps_fetches_per_domain(server):
+    feeds = [f"{server.base}/rss?q={{query}}&page={page}" for page in range(4)]
+    limiter = RecordingLimiter(per_domain=1, interval=0.2)
+    asyncio.run(make_crawler(server, feeds=feeds, domain_limiter=limiter).crawl("markets"))
+
+    assert len(server.requests) == 4
+    assert server.max_active == 1
+    starts = limiter.starts
+    # The event loop may wake a sleeper a few milliseconds early
+    assert all(later - earlier >= 0.19 for earlier, later in zip(starts, starts[1:]))
@@ -1,21 +1,93 @@
-from urllib.parse import quote_plus
-from dotenv import load_dotenv
+from urllib.parse import quote_plus, urljoin, urlparse
 import requests
 import os
 from fastapi import HTTPException
-from bs4 import BeautifulSoup
-import ollama
-from datetime import datetime
 from pathlib import Path
-from gtts import gTTS
+import hashlib
+import io
+import json
+import threading
+import time
+import uuid
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from deadline import raise_if_cancelled, stage_timeout, RequestCancelled, MIN_LLM_SECONDS, TTS_RESERVE_SECONDS
+
+BRIGHTDATA_TIMEOUT_SECONDS = 60
+OLLAMA_TIMEOUT_SECONDS = 300
+TTS_TIMEOUT_SECONDS = 30
+STREAM_CHUNK_BYTES = 64 * 1024
+AUDIO_COPY_BLOCK_BYTES = 64 * 1024
 
-load_dotenv()
 
 class MCPOverloadedError(Exception):
     """Custom exception for MCP service overloads"""
     pass
 
 
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Process-wide pooled HTTP session shared by BrightData and Ollama calls
+
+    Reusing one session keeps TCP/TLS connections alive between requests.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            pool_size = int(os.getenv("HTTP_POOL_SIZE", "20"))
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def close_http_session() -> None:
+    """Close the pooled session (called on app shutdown)"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+
+
+def ollama_warm_up(model: str = "llama3.2") -> None:
+    """Load the model into Ollama memory ahead of the first request"""
+    ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    # A generate call without a prompt only loads the model
+    response = get_http_session().post(
+        f"{ollama_host}/api/generate",
+        json={"model": model, "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m")},
+        timeout=OLLAMA_TIMEOUT_SECONDS
+    )
+    response.raise_for_status()
+
+
+def ollama_model_loaded(model: str = "llama3.2") -> bool:
+    """Whether Ollama is reachable and currently has the model in memory"""
+    ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    try:
+        response = get_http_session().get(f"{ollama_host}/api/ps", timeout=2)
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        return False
+    loaded = [m.get("name", "") for m in response.json().get("models", [])]
+    return any(name == model or name.startswith(f"{model}:") for name in loaded)
+
+
+def tts_warm_up() -> None:
+    """Synthesize a tiny phrase in memory to check the gTTS backend is reachable"""
+    from gtts import gTTS
+
+    gTTS(text="Ready", lang="en", slow=False, timeout=TTS_TIMEOUT_SECONDS).write_to_fp(io.BytesIO())
+
+
 def generate_valid_news_url(keyword: str) -> str:
     """
     Generate a Google News search URL for a keyword with optional sorting by latest
@@ -30,16 +102,31 @@ def generate_valid_news_url(keyword: str) -> str:
     return f"https://news.google.com/search?q={q}&tbs=sbd:1"
 
 
-def generate_news_urls_to_scrape(list_of_keywords):
-    valid_urls_dict = {}
-    for keyword in list_of_keywords:
-        valid_urls_dict[keyword] = generate_valid_news_url(keyword)
-    
-    return valid_urls_dict
+def generate_news_result_page_urls(keyword: str, pages: int = 1) -> list:
+    """
+    Generate up to `pages` distinct Google News result listings for a keyword
+
+    Google News has no numbered pagination, so extra "pages" are the other
+    listings for the same query: latest first, top stories, and the past week.
 
+    Args:
+        keyword: Search term to use in the news search
+        pages: Number of listings to return (1-3)
 
-def scrape_with_brightdata(url: str) -> str:
-    """Scrape a URL using BrightData"""
+    Returns:
+        list: Result page URLs, the latest-first listing always first
+    """
+    q = quote_plus(keyword)
+    listings = [
+        generate_valid_news_url(keyword),
+        f"https://news.google.com/search?q={q}",
+        f"https://news.google.com/search?q={q}+when%3A7d",
+    ]
+    return listings[:max(1, pages)]
+
+
+def scrape_with_brightdata(url: str, timeout: float = None) -> str:
+    """Scrape a URL using BrightData, optionally capping the timeout further"""
     headers = {
         "Authorization": f"Bearer {os.getenv('BRIGHTDATA_API_KEY')}",
         "Content-Type": "application/json"
@@ -50,53 +137,199 @@ def scrape_with_brightdata(url: str) -> str:
         "url": url,
         "format": "raw"
     }
+    cap = min(timeout, BRIGHTDATA_TIMEOUT_SECONDS) if timeout else BRIGHTDATA_TIMEOUT_SECONDS
+    # Leave enough of the request budget for summarization and TTS
+    timeout = stage_timeout(cap, reserve=MIN_LLM_SECONDS + TTS_RESERVE_SECONDS)
     
     try:
-        response = requests.post("https://api.brightdata.com/request", json=payload, headers=headers)
-        response.raise_for_status()
-        return response.text
+        # Streamed so a cancelled request stops downloading between chunks
+        with get_http_session().post(
+            "https://api.brightdata.com/request",
+            json=payload,
+            headers=headers,
+            timeout=timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                raise_if_cancelled()
+                body += chunk
+            return body.decode(response.encoding or "utf-8", errors="replace")
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"BrightData error: {str(e)}")
 
 
-def clean_html_to_text(html_content: str) -> str:
-    """Clean HTML content to plain text"""
-    soup = BeautifulSoup(html_content, "html.parser")
-    text = soup.get_text(separator="\n")
-    return text.strip()
+class TextLineParser(HTMLParser):
+    """
+    Streaming extractor for the text nodes of an HTML document.
+
+    Collects text nodes as they are parsed, skipping non-content containers
+    (script, style, template, ruby annotations), so the caller never holds a
+    parse tree or a full text copy.
+    Each node is kept as (text, href of the enclosing <a> or None).
+    """
+
+    SKIP_TAGS = {"script", "style", "template", "rt", "rp"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.nodes = []
+        self._text = []
+        self._skip_depth = 0
+        self._links = []
+
+    def _flush(self):
+        # A text node ends at the next markup event, wherever feed() chunks were split
+        if self._text:
+            self.nodes.append(("".join(self._text), self._links[-1] if self._links else None))
+            self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "a":
+            self._links.append(dict(attrs).get("href"))
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "a" and self._links:
+            self._links.pop()
+
+    def handle_comment(self, data):
+        self._flush()
 
+    def handle_decl(self, decl):
+        self._flush()
 
-def extract_headlines(cleaned_text: str) -> str:
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith("CDATA[") and not self._skip_depth:
+            self.nodes.append((data[len("CDATA["):], self._links[-1] if self._links else None))
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def iter_linked_lines(html_content: str, chunk_size: int = 64 * 1024) -> Iterator[Tuple[str, Optional[str]]]:
     """
-    Extract and concatenate headlines from cleaned news text content.
-    
+    Lazily yield the stripped, non-empty text lines of an HTML document
+
     Args:
-        cleaned_text: Raw text from news page after HTML cleaning
-        
-    Returns:
-        str: Combined headlines separated by newlines
+        html_content: Raw HTML
+        chunk_size: Characters handed to the parser per step
+
+    Yields:
+        tuple: (line, href of the link the line sits in, or None)
     """
-    headlines = []
-    current_block = []
-    
-    # Split text into lines and remove empty lines
-    lines = [line.strip() for line in cleaned_text.split('\n') if line.strip()]
-    
-    # Process lines to find headline blocks
-    for line in lines:
-        if line == "More":
-            if current_block:
-                # First line of block is headline
-                headlines.append(current_block[0])
-                current_block = []
+    parser = TextLineParser()
+    starts = range(0, len(html_content), chunk_size)
+    for start in [*starts, None]:
+        if start is None:
+            parser.close()
         else:
-            current_block.append(line)
-    
+            parser.feed(html_content[start:start + chunk_size])
+        nodes, parser.nodes = parser.nodes, []
+        for node, href in nodes:
+            for line in node.split("\n"):
+                line = line.strip()
+                if line:
+                    yield line, href
+
+
+def iter_headlines(lines: Iterable[Tuple[str, Optional[str]]]) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Yield (headline, href) pairs from the (line, href) pairs of a news listing
+
+    Entries on the page are separated by a "More" line; the first line of
+    each entry is its headline.
+    """
+    headline = None
+    for text, href in lines:
+        if not text:
+            continue
+        if text == "More":
+            if headline is not None:
+                yield headline
+                headline = None
+        elif headline is None:
+            headline = (text, href)
+
     # Add any remaining block at end of text
-    if current_block:
-        headlines.append(current_block[0])
-    
-    return "\n".join(headlines)
+    if headline is not None:
+        yield headline
+
+
+def headlines_from_html(html_content: str, base_url: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+    """
+    Headlines of a news listing page, parsed in one streaming pass over the raw HTML
+
+    Args:
+        html_content: Raw HTML of the listing
+        base_url: URL of the listing, used to resolve relative article links
+
+    Returns:
+        list: (headline, absolute article URL or None) tuples
+    """
+    headlines = []
+    for title, href in iter_headlines(iter_linked_lines(html_content)):
+        link = urljoin(base_url, href) if href and base_url else href
+        if link and urlparse(link).scheme not in ("http", "https"):
+            link = None
+        headlines.append((title, link))
+    return headlines
+
+
+def ollama_generate(prompt: str, timeout: float, options: Optional[dict] = None, model: str = "llama3.2") -> str:
+    """
+    Run an Ollama completion as a stream so it can be abandoned mid-generation
+
+    The current request's cancellation flag is checked between streamed
+    chunks. Closing the response early makes Ollama stop generating.
+
+    Args:
+        prompt: Full prompt text
+        timeout: Seconds allowed for the whole call, not just for each read
+        options: Optional Ollama generation options
+
+    Returns:
+        str: The generated text
+    """
+    ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    payload = {"model": model, "prompt": prompt, "stream": True}
+    if options:
+        payload["options"] = options
+    expires_at = time.monotonic() + timeout
+    parts = []
+    with get_http_session().post(f"{ollama_host}/api/generate", json=payload, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            raise_if_cancelled()
+            if time.monotonic() > expires_at:
+                raise requests.exceptions.ReadTimeout(f"Ollama generation took longer than {timeout:.0f}s")
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"])
+            parts.append(chunk.get("response", ""))
+            if chunk.get("done"):
+                break
+    return "".join(parts)
 
 
 def summarize_with_ollama(headlines) -> str:
@@ -105,30 +338,23 @@ def summarize_with_ollama(headlines) -> str:
     So no extra stuff other than text which the podcaster/newscaster should read, no special symbols or extra information in between and of course no preamble please.
     {headlines}
     News Script:"""
+    timeout = stage_timeout(OLLAMA_TIMEOUT_SECONDS, reserve=TTS_RESERVE_SECONDS)
 
     try:
-        # Direct API call instead of client
-        import requests
-        import json
-        
-        ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-        response = requests.post(
-            f"{ollama_host}/api/generate",
-            json={
-                "model": "llama3.2",
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=300
-        )
-        response.raise_for_status()
-        return response.json()['response']
+        return ollama_generate(prompt, timeout)
+    except RequestCancelled:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ollama error: {str(e)}")
 
 
-def generate_broadcast_news_free(news_data, reddit_data, topics):
-    """Generate broadcast news using Ollama (FREE alternative to Anthropic)"""
+def generate_broadcast_news_free(topic_results):
+    """
+    Generate broadcast news using Ollama (FREE alternative to Anthropic)
+
+    Args:
+        topic_results: TopicResult records, one per requested topic
+    """
     system_prompt = """You are a professional news anchor writing a broadcast script. Create a natural, engaging news report.
 
 RULES:
@@ -142,46 +368,33 @@ RULES:
 - Just pure, readable news script
 
 Each topic should sound natural when read aloud."""
+    timeout = stage_timeout(OLLAMA_TIMEOUT_SECONDS, reserve=TTS_RESERVE_SECONDS)
 
     try:
-        import requests
-        
         topic_blocks = []
-        for topic in topics:
-            news_content = news_data.get("news_analysis", {}).get(topic, "") if news_data else ''
-            reddit_content = reddit_data.get("reddit_analysis", {}).get(topic, "") if reddit_data else ''
-            
+        for result in topic_results:
             content_parts = []
-            if news_content and news_content.strip():
-                content_parts.append(f"News: {news_content}")
-            if reddit_content and reddit_content.strip():
-                content_parts.append(f"Discussion: {reddit_content}")
+            if result.news and result.news.strip():
+                content_parts.append(f"News: {result.news}")
+            if result.discussion and result.discussion.strip():
+                content_parts.append(f"Discussion: {result.discussion}")
             
             if content_parts:
-                topic_blocks.append(f"Topic: {topic}\n" + "\n".join(content_parts))
+                topic_blocks.append(f"Topic: {result.topic}\n" + "\n".join(content_parts))
 
         if not topic_blocks:
             return "No content available to generate news script."
 
         user_prompt = "Create a news broadcast script from this content:\n\n" + "\n\n".join(topic_blocks)
 
-        # Use Ollama via direct API call
-        ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-        response = requests.post(
-            f"{ollama_host}/api/generate",
-            json={
-                "model": "llama3.2",
-                "prompt": f"{system_prompt}\n\n{user_prompt}",
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "num_predict": 2000
-                }
-            },
-            timeout=300
-        )
-        response.raise_for_status()
-        result = response.json()['response'].strip()
+        result = ollama_generate(
+            f"{system_prompt}\n\n{user_prompt}",
+            timeout,
+            options={
+                "temperature": 0.3,
+                "num_predict": 2000
+            }
+        ).strip()
         
         # Clean up any remaining artifacts
         result = result.replace("**", "").replace("##", "").replace("--", " ")
@@ -191,34 +404,141 @@ Each topic should sound natural when read aloud."""
         raise e
 
 
-def tts_to_audio(text: str, language: str = 'en') -> str:
+def headlines_to_script(topic: str, headlines: str, limit: int = 5) -> str:
     """
-    Convert text to speech using gTTS (Google Text-to-Speech) - FREE
-    
+    Build a short readable script straight from headlines, without an LLM call
+
+    Used as the degraded result when the request deadline leaves no time for Ollama.
+    """
+    lines = [line.strip().rstrip(".") for line in headlines.split("\n") if line.strip()][:limit]
+    if not lines:
+        return ""
+    return f"Top headlines on {topic}. " + ". ".join(lines) + "."
+
+
+def headlines_only_script(topic_results) -> str:
+    """Assemble a broadcast script from per-topic content without an LLM call"""
+    paragraphs = []
+    for result in topic_results:
+        parts = [
+            part.strip() for part in (result.news, result.discussion)
+            if part and part.strip() and not part.startswith("Error:")
+        ]
+        if parts:
+            paragraphs.append(f"Now, {result.topic}.\n" + "\n".join(parts))
+
+    if not paragraphs:
+        return "No content available to generate news script."
+
+    result = "\n\n".join(paragraphs)
+    return result.replace("**", "").replace("##", "").replace("--", " ")
+
+
+def split_text_for_tts(text: str, max_chars: int = 600) -> list:
+    """
+    Split a script into paragraph/sentence chunks small enough to synthesize quickly
+
+    Args:
+        text: Full script to split
+        max_chars: Soft upper bound on characters per chunk
+
+    Returns:
+        list: Non-empty text chunks in reading order
+    """
+    chunks = []
+    current = ""
+
+    for paragraph in (p.strip() for p in text.split("\n")):
+        if not paragraph:
+            continue
+        # Break long paragraphs on sentence boundaries
+        sentences = paragraph.replace("? ", "?\n").replace("! ", "!\n").replace(". ", ".\n").split("\n")
+        for sentence in sentences:
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current} {sentence}".strip()
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def tts_to_audio_chunks(text: str, language: str = 'en', max_chars: int = 600):
+    """
+    Convert text to speech chunk by chunk so partial audio is available early
+
     Args:
         text: Input text to convert
         language: Language code (default: 'en')
-    
-    Returns:
-        str: Path to saved audio file
+        max_chars: Soft upper bound on characters per chunk
+
+    Yields:
+        tuple: (chunk index, total chunks, path to chunk MP3)
     """
-    try:
-        # Ensure output directory exists
-        audio_dir = Path("audio")
-        audio_dir.mkdir(exist_ok=True)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = audio_dir / f"tts_{timestamp}.mp3"
-        
-        # Create TTS object and save
-        tts = gTTS(text=text, lang=language, slow=False)
+    from gtts import gTTS
+
+    audio_dir = Path("audio")
+    audio_dir.mkdir(exist_ok=True)
+
+    request_id = uuid.uuid4().hex[:12]
+    chunks = split_text_for_tts(text, max_chars=max_chars)
+
+    for index, chunk in enumerate(chunks, start=1):
+        filename = audio_dir / f"tts_{request_id}_{index:03d}.mp3"
+        tts = gTTS(text=chunk, lang=language, slow=False, timeout=stage_timeout(TTS_TIMEOUT_SECONDS))
         tts.save(str(filename))
-        
-        return str(filename)
-    except Exception as e:
-        print(f"gTTS Error: {str(e)}")
-        return None
+        yield index, len(chunks), str(filename)
+
+
+def store_audio_by_hash(paths, audio_dir: str = "audio") -> str:
+    """
+    Join MP3 chunks (MP3 frames can be concatenated directly) into a content-addressed file
+
+    Args:
+        paths: Chunk files in playback order
+        audio_dir: Directory the final file is written to
+
+    Returns:
+        str: Path to <audio_dir>/<sha256 of the audio>.mp3
+    """
+    digest = hashlib.sha256()
+    tmp_path = Path(audio_dir) / f".tmp_{uuid.uuid4().hex}.mp3"
+    with open(tmp_path, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as f:
+                # Copy in blocks so no chunk is ever held in memory whole
+                for block in iter(lambda: f.read(AUDIO_COPY_BLOCK_BYTES), b""):
+                    digest.update(block)
+                    out.write(block)
+    final_path = Path(audio_dir) / f"{digest.hexdigest()}.mp3"
+    os.replace(tmp_path, final_path)
+    return str(final_path)
+
+
+def sweep_audio_chunks(audio_dir: str, max_age_seconds: float) -> int:
+    """
+    Delete per-chunk TTS files (and abandoned temp files) older than `max_age_seconds`
+
+    Chunks are only needed until they have been joined into the hashed file
+    and clients streaming partial audio have fetched them.
+
+    Returns:
+        int: Number of files removed
+    """
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for pattern in ("tts_*.mp3", ".tmp_*.mp3"):
+        for path in Path(audio_dir).glob(pattern):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                # Another worker swept it first
+                pass
+    return removed
 
 
 def summarize_with_anthropic_news_script(api_key: str, headlines: str) -> str:
@@ -238,21 +558,13 @@ The final output will be read aloud by a news anchor or text-to-speech engine. S
 
 Remember: Your only output should be a clean script that is ready to be read out loud.
 """
+    # Per-topic summaries must leave time for the final broadcast call and TTS
+    timeout = stage_timeout(OLLAMA_TIMEOUT_SECONDS, reserve=MIN_LLM_SECONDS + TTS_RESERVE_SECONDS)
 
     try:
-        import requests
-        
-        ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-        response = requests.post(
-            f"{ollama_host}/api/generate",
-            json={
-                "model": "llama3.2",
-                "prompt": f"{system_prompt}\n\nHeadlines to summarize:\n{headlines}",
-                "stream": False
-            },
-            timeout=300
-        )
-        response.raise_for_status()
-        return response.json()['response']
+        return ollama_generate(f"{system_prompt}\n\nHeadlines to summarize:\n{headlines}", timeout)
+    except (requests.exceptions.Timeout, RequestCancelled):
+        # Let the caller fall back to a headlines-only summary (or stop)
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ollama error: {str(e)}")
\ No newline at end of file